@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Read by the settings to default to per-request database connections
+os.environ.setdefault('SERVER_INTERFACE', 'asgi')
 
 application = get_asgi_application()
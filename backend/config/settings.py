@@ -79,6 +79,30 @@ DATABASES = {
     }
 }
 
+# Connection reuse. With DB_POOL (psycopg 3's pool, installed by the
+# psycopg[binary,pool] requirement), each process keeps a pool of
+# DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE connections and a request waits at
+# most DB_POOL_TIMEOUT seconds for one. Otherwise connections persist for
+# DB_CONN_MAX_AGE seconds, except under ASGI (config/asgi.py sets
+# SERVER_INTERFACE), where they default to one per request: async views
+# run their queries on executor threads whose connections are never
+# closed at the end of a request, so persistent ones would pile up. Use
+# DB_POOL there instead. Either way connections are checked before reuse.
+SERVER_INTERFACE = config('SERVER_INTERFACE', default='wsgi')
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if config('DB_POOL', default=False, cast=bool):
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = config(
+        'DB_CONN_MAX_AGE', default=0 if SERVER_INTERFACE == 'asgi' else 60, cast=int
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -125,6 +149,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # Vite default port
 ]
+CORS_EXPOSE_HEADERS = ["ETag", "Last-Modified", "X-Data-Version", "X-Cache"]
 
 # Media files (for pet photos)
 MEDIA_URL = '/media/'
@@ -133,11 +158,96 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'pets.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Number of reverse proxies in front of the app. Throttles identify
+    # clients by the X-Forwarded-For entry the nearest of them appended,
+    # or by REMOTE_ADDR with 0, never by a client-supplied header.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+    # Attempt limits of the login and registration endpoints, checked
+    # before any password is hashed
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': config('AUTH_IP_THROTTLE_RATE', default='30/min'),
+        'auth_username': config('AUTH_USERNAME_THROTTLE_RATE', default='10/min'),
+    },
 }
+
+# Password hashing pool of the login and registration endpoints: hashes
+# run concurrently, further requests allowed to wait, and the longest wait
+# in seconds before answering 503
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=4, cast=int)
+PASSWORD_HASH_QUEUE_SIZE = config('PASSWORD_HASH_QUEUE_SIZE', default=16, cast=int)
+PASSWORD_HASH_TIMEOUT = config('PASSWORD_HASH_TIMEOUT', default=10, cast=float)
+
+# Number of most recent records of each type embedded in the pet detail
+# response; the full history is available from the record endpoints.
+PET_DETAIL_RECORD_LIMIT = config('PET_DETAIL_RECORD_LIMIT', default=20, cast=int)
+
+# Maximum number of records accepted by the bulk record endpoints
+RECORD_BATCH_MAX_SIZE = config('RECORD_BATCH_MAX_SIZE', default=500, cast=int)
+
+# Number of readings the weight series endpoint downsamples to by default,
+# and the most a client may ask for with ?points=
+WEIGHT_SERIES_DEFAULT_POINTS = config('WEIGHT_SERIES_DEFAULT_POINTS', default=500, cast=int)
+WEIGHT_SERIES_MAX_POINTS = config('WEIGHT_SERIES_MAX_POINTS', default=2000, cast=int)
+
+# Widest ?within= window of the vaccinations due endpoint, in days
+VACCINATION_DUE_MAX_DAYS = config('VACCINATION_DUE_MAX_DAYS', default=366, cast=int)
+
+# Caches: "default" holds the per-user data versions, "responses" the
+# serialized pet list/detail responses. Set REDIS_URL (requires the redis
+# package) so that all worker processes share them.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'responses': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'responses',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'responses': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'responses',
+            'OPTIONS': {
+                'MAX_ENTRIES': config('PET_RESPONSE_CACHE_MAX_ENTRIES', default=1000, cast=int),
+            },
+        },
+    }
+
+# Whether every process sees the same data versions. The ETags of the
+# listings, the X-Data-Version header and the response cache keys all come
+# from them, so without a shared cache (several LocMem workers) they are
+# turned off rather than left to serve stale 304s and bodies. Defaults to
+# on with REDIS_URL; set it for a single-process LocMem deployment.
+DATA_VERSIONS_SHARED = config('DATA_VERSIONS_SHARED', default=bool(REDIS_URL), cast=bool)
+
+# Cache alias and lifetime (seconds) of cached pet responses; 0 disables
+PET_RESPONSE_CACHE_ALIAS = config('PET_RESPONSE_CACHE_ALIAS', default='responses')
+PET_RESPONSE_CACHE_TIMEOUT = config('PET_RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Token authentication cache: entries per process and their lifetime in
+# seconds, plus a cache alias shared by all processes ("default" with
+# REDIS_URL). With the shared cache, a revoked token is refused by every
+# process on its next request. Without it, other processes accept it for
+# up to AUTH_TOKEN_CACHE_TTL seconds, hence the short default.
+AUTH_TOKEN_CACHE_SIZE = config('AUTH_TOKEN_CACHE_SIZE', default=10000, cast=int)
+AUTH_TOKEN_SHARED_CACHE = config('AUTH_TOKEN_SHARED_CACHE', default='default' if REDIS_URL else '')
+AUTH_TOKEN_CACHE_TTL = config(
+    'AUTH_TOKEN_CACHE_TTL', default=60 if AUTH_TOKEN_SHARED_CACHE else 5, cast=int
+)
+AUTH_TOKEN_SHARED_CACHE_TTL = config('AUTH_TOKEN_SHARED_CACHE_TTL', default=300, cast=int)
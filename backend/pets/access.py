@@ -0,0 +1,142 @@
+from django.db import transaction
+from .models import Pet, PetShare, PetAccess
+
+OWNER = 'owner'
+EDITOR = 'editor'
+VIEWER = 'viewer'
+
+# Roles allowed to create, update and delete records on a pet
+WRITE_ROLES = (OWNER, EDITOR)
+
+
+def get_pet_roles(request):
+    """
+    Return a {pet_id: role} map of every pet the requesting user can access.
+
+    The map is loaded with a single query the first time it is needed and
+    memoized on the request, so permissions, viewsets and serializers all
+    share one lookup per request.
+    """
+    roles = getattr(request, '_pet_roles', None)
+    if roles is None:
+        user = request.user
+        if not user or not user.is_authenticated:
+            roles = {}
+        else:
+            roles = dict(
+                PetAccess.objects.filter(user=user).values_list('pet_id', 'role')
+            )
+        request._pet_roles = roles
+    return roles
+
+
+def get_pet_role(request, pet):
+    """
+    Return the requesting user's role on a pet ('owner', 'editor', 'viewer')
+    or None. `pet` may be a Pet instance or a pet primary key.
+    """
+    if isinstance(pet, Pet):
+        # Ownership is known without a query, which also covers pets
+        # created after the role map was loaded.
+        if pet.owner_id is not None and pet.owner_id == request.user.pk:
+            return OWNER
+        pet = pet.pk
+    return get_pet_roles(request).get(pet)
+
+
+# PetAccess maintenance
+
+
+def expected_pet_access(pet_ids):
+    """
+    Compute the {(user_id, pet_id): role} rows PetAccess should hold for the
+    given pets, derived from Pet.owner and PetShare.
+    """
+    expected = {}
+    shares = PetShare.objects.filter(pet_id__in=pet_ids).values_list(
+        'shared_with_id', 'pet_id', 'role'
+    )
+    for user_id, pet_id, role in shares:
+        expected[(user_id, pet_id)] = role
+    owners = Pet.objects.filter(pk__in=pet_ids, owner__isnull=False).values_list(
+        'owner_id', 'pk'
+    )
+    for user_id, pet_id in owners:
+        # Ownership always wins over a share for the same user
+        expected[(user_id, pet_id)] = OWNER
+    return expected
+
+
+def rebuild_pet_access(pet_ids):
+    """Replace the PetAccess rows of the given pets with freshly derived ones."""
+    pet_ids = list(pet_ids)
+    with transaction.atomic():
+        PetAccess.objects.filter(pet_id__in=pet_ids).delete()
+        PetAccess.objects.bulk_create(
+            PetAccess(user_id=user_id, pet_id=pet_id, role=role)
+            for (user_id, pet_id), role in expected_pet_access(pet_ids).items()
+        )
+
+
+def find_pet_access_drift(pet_ids):
+    """
+    Compare PetAccess with the rows derived from ownership and shares.
+
+    Returns a list of (user_id, pet_id, expected_role, actual_role) tuples,
+    where a role of None means the row is missing on that side.
+    """
+    expected = expected_pet_access(pet_ids)
+    actual = {
+        (user_id, pet_id): role
+        for user_id, pet_id, role in PetAccess.objects.filter(
+            pet_id__in=pet_ids
+        ).values_list('user_id', 'pet_id', 'role')
+    }
+    drift = []
+    for user_id, pet_id in sorted(expected.keys() | actual.keys()):
+        expected_role = expected.get((user_id, pet_id))
+        actual_role = actual.get((user_id, pet_id))
+        if expected_role != actual_role:
+            drift.append((user_id, pet_id, expected_role, actual_role))
+    return drift
+
+
+def grant_pet_access(user_id, pet_id, role):
+    """Insert or update a single PetAccess row in one statement."""
+    PetAccess.objects.bulk_create(
+        [PetAccess(user_id=user_id, pet_id=pet_id, role=role)],
+        update_conflicts=True,
+        unique_fields=['user', 'pet'],
+        update_fields=['role'],
+    )
+
+
+def sync_owner_access(pet, created=False):
+    """
+    Keep the owner row of a pet in line with Pet.owner. Returns the ids of
+    the users who were the owner until now.
+    """
+    if created:
+        if pet.owner_id is not None:
+            grant_pet_access(pet.owner_id, pet.pk, OWNER)
+        return []
+    owner_rows = list(
+        PetAccess.objects.filter(pet=pet, role=OWNER).values_list('user_id', flat=True)
+    )
+    expected = [pet.owner_id] if pet.owner_id is not None else []
+    if owner_rows != expected:
+        # Ownership changed: the previous owner may still hold a share
+        rebuild_pet_access([pet.pk])
+    return [user_id for user_id in owner_rows if user_id not in expected]
+
+
+def sync_share_access(share, deleted=False):
+    """Mirror a PetShare create/update/delete into PetAccess."""
+    if deleted:
+        PetAccess.objects.filter(
+            pet_id=share.pet_id, user_id=share.shared_with_id
+        ).exclude(role=OWNER).delete()
+    elif not PetAccess.objects.filter(
+        pet_id=share.pet_id, user_id=share.shared_with_id, role=OWNER
+    ).exists():
+        grant_pet_access(share.shared_with_id, share.pet_id, share.role)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Pet, WeightRecord, Vaccination, VetVisit, PetShare
+from .models import Pet, WeightRecord, Vaccination, VetVisit, PetShare, PetAccess, HistoryImport, PetSummary
 
 
 @admin.register(Pet)
@@ -34,3 +34,23 @@ class PetShareAdmin(admin.ModelAdmin):
     list_display = ['pet', 'shared_with', 'role', 'created_at']
     list_filter = ['role', 'created_at']
     search_fields = ['pet__name', 'shared_with__username']
+
+
+@admin.register(PetAccess)
+class PetAccessAdmin(admin.ModelAdmin):
+    list_display = ['user', 'pet', 'role']
+    list_filter = ['role']
+    search_fields = ['pet__name', 'user__username']
+
+
+@admin.register(HistoryImport)
+class HistoryImportAdmin(admin.ModelAdmin):
+    list_display = ['pet', 'source_name', 'status', 'rows_processed', 'error_count', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['pet__name', 'source_name']
+
+
+@admin.register(PetSummary)
+class PetSummaryAdmin(admin.ModelAdmin):
+    list_display = ['pet', 'latest_weight', 'latest_weight_unit', 'weight_record_count', 'vaccination_count', 'vet_visit_count', 'refreshed_at']
+    search_fields = ['pet__name']
@@ -0,0 +1,181 @@
+from bisect import bisect_right
+from datetime import date, timedelta
+import numpy as np
+from django.contrib.postgres.aggregates import RegrSlope
+from decimal import Decimal
+from django.db.models import Avg, Count, F, Max, Min, Sum, Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Extract, Round, TruncMonth
+from .models import GRAMS_PER_UNIT, grams_in
+
+WEIGHT_UNITS = tuple(GRAMS_PER_UNIT)
+
+# Rolling averages over this many consecutive readings
+ROLLING_WINDOWS = (7, 30)
+
+# Percent change of the latest reading against the one N days earlier
+CHANGE_PERIODS = (30, 90, 365)
+
+SECONDS_PER_DAY = 86400
+
+EPOCH = date(1970, 1, 1)
+
+
+def _percent_change(dates, weights, days):
+    """Change of the latest weight against the last reading at least `days` older."""
+    index = bisect_right(dates, dates[-1] - timedelta(days=days)) - 1
+    if index < 0 or not weights[index]:
+        return None
+    return round((weights[-1] - weights[index]) / weights[index] * 100, 2)
+
+
+def weight_stats(pet, unit='kg'):
+    """
+    Weight trend analytics of a pet, normalized to `unit`.
+
+    The series with its rolling averages comes from one window-function
+    query and the summary (count, min/max, trend slope) from one aggregate
+    query, so no per-reading work happens in Python beyond building the
+    response.
+    """
+    weight = grams_in(unit)
+    records = pet.weight_records.order_by()
+    rolling = {
+        f'rolling_{size}': Round(
+            Window(
+                Avg(weight),
+                order_by=F('date').asc(),
+                frame=RowRange(start=-(size - 1), end=0),
+            ),
+            2,
+        )
+        for size in ROLLING_WINDOWS
+    }
+    series = list(
+        records.annotate(value=Round(weight, 2), **rolling)
+        .order_by('date')
+        .values('date', 'value', *rolling)
+    )
+    summary = records.aggregate(
+        count=Count('pk'),
+        min=Min(weight),
+        max=Max(weight),
+        slope=RegrSlope(y=weight, x=Extract('date', 'epoch')),
+    )
+
+    change = {f'{days}d': None for days in CHANGE_PERIODS}
+    latest = None
+    if series:
+        dates = [point['date'] for point in series]
+        weights = [point['value'] for point in series]
+        latest = {'date': dates[-1], 'weight': weights[-1]}
+        change = {
+            f'{days}d': _percent_change(dates, weights, days) for days in CHANGE_PERIODS
+        }
+    slope = summary['slope']
+    return {
+        'unit': unit,
+        'count': summary['count'],
+        'min': round(summary['min'], 2) if summary['min'] is not None else None,
+        'max': round(summary['max'], 2) if summary['max'] is not None else None,
+        'latest': latest,
+        'percent_change': change,
+        # Linear regression slope in `unit` per day
+        'trend_per_day': round(slope * SECONDS_PER_DAY, 4) if slope is not None else None,
+        'series': [
+            {'date': point['date'], 'weight': point['value'],
+             **{name: point[name] for name in rolling}}
+            for point in series
+        ],
+    }
+
+
+def lttb(data, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling of an (n, 2) array of
+    (x, y) points sorted by x to `threshold` points.
+
+    The first and last points are always kept. The remaining points are
+    split into threshold - 2 buckets, and each bucket keeps the point that
+    forms the largest triangle with the previously kept point and the
+    average of the next bucket.
+    """
+    n = len(data)
+    if threshold >= n or threshold < 3:
+        return data
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = n - 1, n
+        next_x, next_y = data[next_start:next_end].mean(axis=0)
+        prev_x, prev_y = data[previous]
+        candidates = data[start:end]
+        areas = np.abs(
+            (prev_x - next_x) * (candidates[:, 1] - prev_y)
+            - (prev_x - candidates[:, 0]) * (next_y - prev_y)
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return data[selected]
+
+
+def weight_series(pet, unit='kg', points=None):
+    """
+    The pet's weight series in `unit`, downsampled with LTTB to at most
+    `points` readings. Returns (readings, total number of readings).
+    """
+    rows = pet.weight_records.order_by('date').values_list(
+        Extract('date', 'epoch') / SECONDS_PER_DAY, grams_in(unit)
+    )
+    data = np.array(rows, dtype=float).reshape(-1, 2)
+    total = len(data)
+    if points is not None:
+        data = lttb(data, points)
+    return [
+        {'date': EPOCH + timedelta(days=int(day)), 'weight': round(float(weight), 2)}
+        for day, weight in data
+    ], total
+
+
+VET_SPEND_GROUPS = ('pet', 'month', 'year', 'veterinarian')
+
+
+def vet_spend_rollups(visits):
+    """
+    Visit count and total cost of `visits` per (pet, month, veterinarian),
+    aggregated in SQL. These rows are small enough to regroup by any of
+    VET_SPEND_GROUPS in Python.
+    """
+    return list(
+        visits.order_by()
+        .values('pet_id', 'veterinarian', pet_name=F('pet__name'), month=TruncMonth('date'))
+        .annotate(visit_count=Count('pk'), total_cost=Sum('cost'))
+    )
+
+
+def group_vet_spend(rollups, group_by):
+    """Combine rollup rows into one entry per `group_by` value."""
+    groups = {}
+    for row in rollups:
+        if group_by == 'pet':
+            key = (row['pet_name'], row['pet_id'])
+            fields = {'pet': row['pet_id'], 'pet_name': row['pet_name']}
+        elif group_by == 'month':
+            key = row['month']
+            fields = {'month': row['month'].strftime('%Y-%m')}
+        elif group_by == 'year':
+            key = row['month'].year
+            fields = {'year': key}
+        else:
+            key = row['veterinarian']
+            fields = {'veterinarian': key}
+        group = groups.setdefault(key, {**fields, 'visit_count': 0, 'total_cost': Decimal('0.00')})
+        group['visit_count'] += row['visit_count']
+        group['total_cost'] += row['total_cost'] or 0
+    return [groups[key] for key in sorted(groups)]
@@ -0,0 +1,208 @@
+"""
+Async variants of the read endpoints, served under /api/async/.
+
+These are plain Django async views rather than DRF views, so an ASGI
+worker serves them on its event loop without a thread per request. They
+reuse the DRF serializers on fully loaded instances, which keeps the
+payloads identical to the synchronous endpoints, but skip the response
+cache and conditional request handling of the latter.
+"""
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Prefetch, aprefetch_related_objects
+from django.http import JsonResponse
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    ValidationError,
+)
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .analytics import WEIGHT_UNITS, weight_stats
+from .authentication import aauthenticate
+from .models import Pet, PetShare, Vaccination, VetVisit, WeightRecord
+from .pagination import (
+    TimelinePagination,
+    VaccinationPagination,
+    VetVisitPagination,
+    WeightRecordPagination,
+)
+from .serializers import (
+    PetListSerializer,
+    PetSerializer,
+    TimelineEventSerializer,
+    VaccinationSerializer,
+    VetVisitSerializer,
+    WeightRecordSerializer,
+)
+from .timeline import atimeline_page
+from .views import visible_pets
+
+
+def async_api_view(view):
+    """
+    Authenticate a GET request with the request's token and render the
+    view's return value, or the APIException it raised, as JSON.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return JsonResponse(
+                {'detail': f'Method "{request.method}" not allowed.'}, status=405
+            )
+        try:
+            request.user = await aauthenticate(request)
+            # Serializers read query_params and build absolute links from it
+            drf_request = Request(request, authenticators=())
+            drf_request.user = request.user
+            data = await view(drf_request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            response = JsonResponse(
+                detail, status=exc.status_code, encoder=JSONEncoder, safe=False
+            )
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                response['WWW-Authenticate'] = 'Token'
+            return response
+        return JsonResponse(data, encoder=JSONEncoder, safe=False)
+
+    return wrapper
+
+
+async def aget_pet(request, pk):
+    """The pet `pk` if visible to the user, with the access annotations."""
+    try:
+        return await visible_pets(request.user).aget(pk=pk)
+    except Pet.DoesNotExist:
+        raise NotFound()
+
+
+async def alist(queryset):
+    return [item async for item in queryset]
+
+
+@async_api_view
+async def pet_list(request):
+    """
+    GET /api/async/pets/?page=N
+    Returns: the same page as GET /api/pets/
+    """
+    queryset = visible_pets(request.user).select_related('summary')
+    page_size = api_settings.PAGE_SIZE
+    try:
+        number = int(request.query_params.get('page', 1))
+    except ValueError:
+        number = 0
+    count = await queryset.acount()
+    offset = (number - 1) * page_size
+    if number < 1 or (offset and offset >= count):
+        raise NotFound('Invalid page.')
+    pets = await alist(queryset[offset:offset + page_size])
+    url = request.build_absolute_uri()
+    previous_url = None
+    if number == 2:
+        previous_url = remove_query_param(url, 'page')
+    elif number > 2:
+        previous_url = replace_query_param(url, 'page', number - 1)
+    return {
+        'count': count,
+        'next': replace_query_param(url, 'page', number + 1) if offset + page_size < count else None,
+        'previous': previous_url,
+        'results': PetListSerializer(pets, many=True, context={'request': request}).data,
+    }
+
+
+@async_api_view
+async def pet_detail(request, pk):
+    """
+    GET /api/async/pets/{id}/
+    Returns: the same payload as GET /api/pets/{id}/
+
+    The async ORM runs every query on the one thread that holds the
+    request's connection, so the recent records, record counts and shares
+    are loaded one after the other; awaiting them frees the event loop,
+    not the request's latency.
+    """
+    pet = await aget_pet(request, pk)
+    limit = settings.PET_DETAIL_RECORD_LIMIT
+    records = {
+        'weight_records': WeightRecord.objects.filter(pet=pet),
+        'vaccinations': Vaccination.objects.filter(pet=pet),
+        'vet_visits': VetVisit.objects.filter(pet=pet),
+    }
+    for name, queryset in records.items():
+        # Read by PetSerializer instead of querying again
+        setattr(pet, f'recent_{name}', await alist(queryset[:limit]))
+        setattr(pet, f'{name}_count', await queryset.acount())
+    await aprefetch_related_objects(
+        [pet], Prefetch('shares', queryset=PetShare.objects.select_related('shared_with'))
+    )
+    return PetSerializer(pet, context={'request': request}).data
+
+
+@async_api_view
+async def pet_timeline(request, pk):
+    """
+    GET /api/async/pets/{id}/timeline/?page_size=N&cursor=<next cursor>
+    Returns: the same page as GET /api/pets/{id}/timeline/
+    """
+    pet = await aget_pet(request, pk)
+    paginator = TimelinePagination()
+    events = await paginator.apaginate(
+        lambda limit, cursor: atimeline_page(pet, limit, cursor), request
+    )
+    return paginator.get_paginated_data(TimelineEventSerializer(events, many=True).data)
+
+
+@async_api_view
+async def pet_weight_stats(request, pk):
+    """
+    GET /api/async/pets/{id}/weight-stats/?unit=kg|lb
+    Returns: the same payload as GET /api/pets/{id}/weight-stats/
+    """
+    unit = request.query_params.get('unit', 'kg')
+    if unit not in WEIGHT_UNITS:
+        raise ValidationError({'unit': [f"Must be one of: {', '.join(WEIGHT_UNITS)}."]})
+    pet = await aget_pet(request, pk)
+    # The analytics queries and numpy work run in a worker thread
+    return await sync_to_async(weight_stats)(pet, unit=unit)
+
+
+def record_list(model, serializer_class, pagination_class):
+    """
+    Async list of a record type, newest first with keyset pagination.
+
+    GET /api/async/<records>/?pet=<id>&page_size=N&cursor=<next cursor>
+    Returns: {"next": url or null, "results": [...]}
+    """
+
+    @async_api_view
+    async def view(request):
+        queryset = model.objects.filter(pet__access__user=request.user)
+        pet_id = request.query_params.get('pet')
+        if pet_id is not None:
+            if not pet_id.isdigit():
+                raise ValidationError({'pet': ['A valid integer is required.']})
+            queryset = queryset.filter(pet_id=pet_id)
+        paginator = pagination_class()
+
+        async def fetch_page(limit, cursor):
+            return await alist(paginator.filter_after(queryset, cursor)[:limit])
+
+        records = await paginator.apaginate(fetch_page, request)
+        return paginator.get_paginated_data(
+            serializer_class(records, many=True, context={'request': request}).data
+        )
+
+    return view
+
+
+weight_record_list = record_list(WeightRecord, WeightRecordSerializer, WeightRecordPagination)
+vaccination_list = record_list(Vaccination, VaccinationSerializer, VaccinationPagination)
+vet_visit_list = record_list(VetVisit, VetVisitSerializer, VetVisitPagination)
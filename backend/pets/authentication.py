@@ -0,0 +1,201 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+
+
+class TokenCache:
+    """
+    Resolved token -> (user, token) entries in an in-process LRU with a TTL,
+    optionally backed by a shared cache so that new worker processes skip
+    the database as well.
+
+    Invalidation removes the local entry right away. With a shared cache it
+    also advances the token's shared version, which every entry is tagged
+    with and which every hit is checked against, so other processes stop
+    accepting their local copy on the next request: one small shared cache
+    read per request instead of a database query. Without a shared cache,
+    other processes keep their copy for up to `ttl` seconds.
+    """
+
+    def __init__(self, maxsize, ttl, shared_alias=None, shared_ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self.shared_ttl = shared_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared_keys(self, key):
+        # Tokens are credentials; only their digest leaves the process
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f'pets:auth-token:{digest}', f'pets:auth-token-version:{digest}'
+
+    @property
+    def _version_ttl(self):
+        # Outlives the entries tagged with it; once it expires, they are
+        # checked against a new version and miss
+        return max(self.ttl, self.shared_ttl or 0)
+
+    def _seed(self):
+        # Always ahead of any version handed out before, like data versions
+        return time.time_ns() // 1000
+
+    def _get_local(self, key):
+        """The local (version, value) of `key`, if not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, version, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return version, value
+                del self._entries[key]
+        return None
+
+    def _current(self, entry, version):
+        """Whether a (version, value) entry carries the current version."""
+        return entry is not None and version is not None and entry[0] == version
+
+    def get(self, key):
+        local = self._get_local(key)
+        if not self.shared_alias:
+            return local[1] if local is not None else None
+        cache = caches[self.shared_alias]
+        shared_key, version_key = self._shared_keys(key)
+        version = cache.get(version_key)
+        if self._current(local, version):
+            return local[1]
+        shared = cache.get(shared_key) if version is not None else None
+        if self._current(shared, version):
+            self._store(key, *shared)
+            return shared[1]
+        return None
+
+    async def aget(self, key):
+        local = self._get_local(key)
+        if not self.shared_alias:
+            return local[1] if local is not None else None
+        cache = caches[self.shared_alias]
+        shared_key, version_key = self._shared_keys(key)
+        version = await cache.aget(version_key)
+        if self._current(local, version):
+            return local[1]
+        shared = await cache.aget(shared_key) if version is not None else None
+        if self._current(shared, version):
+            self._store(key, *shared)
+            return shared[1]
+        return None
+
+    def set(self, key, value):
+        if not self.shared_alias:
+            self._store(key, None, value)
+            return
+        cache = caches[self.shared_alias]
+        shared_key, version_key = self._shared_keys(key)
+        version = cache.get(version_key)
+        if version is None:
+            cache.add(version_key, self._seed(), timeout=self._version_ttl)
+            version = cache.get(version_key)
+        self._store(key, version, value)
+        cache.set(shared_key, (version, value), timeout=self.shared_ttl)
+
+    async def aset(self, key, value):
+        if not self.shared_alias:
+            self._store(key, None, value)
+            return
+        cache = caches[self.shared_alias]
+        shared_key, version_key = self._shared_keys(key)
+        version = await cache.aget(version_key)
+        if version is None:
+            await cache.aadd(version_key, self._seed(), timeout=self._version_ttl)
+            version = await cache.aget(version_key)
+        self._store(key, version, value)
+        await cache.aset(shared_key, (version, value), timeout=self.shared_ttl)
+
+    def _store(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared_alias:
+            cache = caches[self.shared_alias]
+            shared_key, version_key = self._shared_keys(key)
+            try:
+                cache.incr(version_key)
+            except ValueError:
+                cache.add(version_key, self._seed(), timeout=self._version_ttl)
+            cache.delete(shared_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL,
+    shared_alias=settings.AUTH_TOKEN_SHARED_CACHE or None,
+    shared_ttl=settings.AUTH_TOKEN_SHARED_CACHE_TTL,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that resolves tokens from `token_cache`, so only
+    the first request of a token within the TTL queries the database.
+    Entries are invalidated by the Token and User signal handlers in
+    pets.signals (logout, token deletion, user changes and deactivation).
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+        # Every request gets its own copies to modify
+        user, token = copy.copy(cached[0]), copy.copy(cached[1])
+        token.user = user
+        return user, token
+
+
+async def aauthenticate(request):
+    """
+    CachedTokenAuthentication for plain async Django views: the user of the
+    request's token, resolved with the async cache and ORM APIs.
+    """
+    authentication = CachedTokenAuthentication()
+    auth = get_authorization_header(request).split()
+    if not auth or auth[0].lower() != authentication.keyword.lower().encode():
+        raise NotAuthenticated()
+    if len(auth) != 2:
+        raise AuthenticationFailed(_('Invalid token header. Token string should not contain spaces.'))
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        raise AuthenticationFailed(
+            _('Invalid token header. Token string should not contain invalid characters.')
+        )
+    cached = await token_cache.aget(key)
+    if cached is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        cached = (token.user, token)
+        await token_cache.aset(key, cached)
+    return copy.copy(cached[0])
@@ -0,0 +1,75 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from .versions import data_versions_shared
+
+CACHE_STATUS_HEADER = 'X-Cache'
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized API responses.
+
+    Entries are stored in the configured cache backend (LRU eviction with
+    LocMem, TTL from PET_RESPONSE_CACHE_TIMEOUT). Callers include the user's
+    data version in the key, so a change visible to the user makes all of
+    their older entries unreachable and no explicit deletes are needed.
+    Unless data versions are shared by all processes, nothing is cached.
+    """
+
+    def __init__(self, alias, timeout):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, user_id, pet_id, version, variant=''):
+        digest = hashlib.md5(variant.encode()).hexdigest()
+        return f'pets:response:{user_id}:{pet_id}:{version}:{digest}'
+
+    def make_pet_key(self, pet_id, version, variant=''):
+        """Key of a response shared by every user with access to the pet."""
+        digest = hashlib.md5(variant.encode()).hexdigest()
+        return f'pets:response:pet:{pet_id}:{version}:{digest}'
+
+    def get(self, key):
+        if not data_versions_shared():
+            return None
+        value = self.cache.get(key)
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key, value):
+        if not data_versions_shared():
+            return
+        self.cache.set(key, value, timeout=self.timeout)
+
+    def _count(self, name):
+        key = f'pets:response-cache:{name}'
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, 0, timeout=None)
+            self.cache.incr(key)
+
+    def stats(self):
+        """Hit and miss counters since the last reset."""
+        counters = self.cache.get_many(
+            ['pets:response-cache:hits', 'pets:response-cache:misses']
+        )
+        return {
+            'hits': counters.get('pets:response-cache:hits', 0),
+            'misses': counters.get('pets:response-cache:misses', 0),
+        }
+
+    def reset_stats(self):
+        self.cache.delete_many(
+            ['pets:response-cache:hits', 'pets:response-cache:misses']
+        )
+
+
+response_cache = ResponseCache(
+    settings.PET_RESPONSE_CACHE_ALIAS, settings.PET_RESPONSE_CACHE_TIMEOUT
+)
@@ -0,0 +1,33 @@
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Strong ETag derived from the given validator values."""
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """
+    Evaluate If-None-Match / If-Modified-Since against the validators and
+    return the 304 (or 412) response to send, or None to build the response.
+    """
+    if etag is None and last_modified is None:
+        return None
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
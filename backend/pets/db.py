@@ -0,0 +1,22 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def connection_stats(alias=DEFAULT_DB_ALIAS):
+    """
+    How this process reuses connections to database `alias`: the
+    persistent connection settings and, when pooled, the pool's counters
+    (psycopg_pool's get_stats(): sizes, waiting requests, wait times,
+    errors...).
+    """
+    connection = connections[alias]
+    # Only the PostgreSQL backend has pools
+    pool = getattr(connection, 'pool', None)
+    stats = {
+        'alias': alias,
+        'pooled': pool is not None,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+    }
+    if pool is not None:
+        stats['pool'] = pool.get_stats()
+    return stats
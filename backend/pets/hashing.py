@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import User
+from rest_framework.exceptions import APIException
+
+
+class HashingUnavailable(APIException):
+    status_code = 503
+    default_detail = 'Too many sign-in requests, please try again shortly.'
+    default_code = 'hashing_unavailable'
+    # Sent as Retry-After by DRF's exception handler
+    wait = 1
+
+
+class PasswordHashingPool:
+    """
+    Bounded thread pool for password hashing.
+
+    At most `workers` hashes run at once and at most `queue_size` more wait
+    for a worker; beyond that, and for jobs still queued after `timeout`
+    seconds, HashingUnavailable (503) is raised right away instead of
+    tying up the request worker. Jobs must not touch the database, as
+    worker threads have their own connections outside the request's
+    transaction.
+    """
+
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='password-hash'
+                )
+            return self._executor
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingUnavailable()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingUnavailable()
+
+
+password_hasher = PasswordHashingPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    timeout=settings.PASSWORD_HASH_TIMEOUT,
+)
+
+
+def _verify(password, encoded):
+    """Check `password`, returning the upgraded hash if the hasher asks for one."""
+    upgraded = []
+    valid = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, upgraded[0] if upgraded else None
+
+
+def hash_password(password):
+    """make_password() on the hashing pool."""
+    return password_hasher.run(make_password, password)
+
+
+def authenticate_user(username, password):
+    """
+    Equivalent of ModelBackend's authenticate() that checks the password on
+    the hashing pool. The user is loaded, and an upgraded hash saved, on the
+    calling thread. Returns None for unknown, inactive or wrong credentials.
+    """
+    try:
+        user = User._default_manager.get_by_natural_key(username)
+    except User.DoesNotExist:
+        # Hash anyway so that unknown usernames take as long as known ones
+        hash_password(password)
+        return None
+    valid, upgraded = password_hasher.run(_verify, password, user.password)
+    if not valid or not user.is_active:
+        return None
+    if upgraded:
+        user.password = upgraded
+        user.save(update_fields=['password'])
+    return user
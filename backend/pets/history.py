@@ -0,0 +1,215 @@
+import csv
+import itertools
+import json
+from collections import defaultdict
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from .models import WeightRecord, Vaccination, VetVisit, HistoryImport
+from .serializers import WeightRecordSerializer, VaccinationSerializer, VetVisitSerializer
+
+# Flat schema shared by history export and import. Each record type maps
+# the columns it uses to its model fields.
+HISTORY_COLUMNS = [
+    'record_type', 'id', 'date', 'weight', 'unit', 'vaccine_name',
+    'due_date', 'reason', 'veterinarian', 'cost', 'notes',
+]
+
+HISTORY_TYPES = {
+    'weight': (WeightRecord, {
+        'date': 'date',
+        'weight': 'weight',
+        'unit': 'unit',
+        'notes': 'notes',
+    }),
+    'vaccination': (Vaccination, {
+        'date': 'date_administered',
+        'vaccine_name': 'vaccine_name',
+        'due_date': 'due_date',
+        'veterinarian': 'veterinarian',
+        'notes': 'notes',
+    }),
+    'vet_visit': (VetVisit, {
+        'date': 'date',
+        'reason': 'reason',
+        'veterinarian': 'veterinarian',
+        'cost': 'cost',
+        'notes': 'notes',
+    }),
+}
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def iter_history(pet, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield every record of a pet as a {column: value} dict, oldest first per
+    record type. Rows are fetched through a server-side cursor in chunks, so
+    memory use does not depend on the length of the history.
+    """
+    for record_type, (model, columns) in HISTORY_TYPES.items():
+        names = list(columns)
+        rows = (
+            model.objects.filter(pet=pet)
+            .order_by(columns['date'], 'id')
+            .values_list('id', *columns.values())
+            .iterator(chunk_size=chunk_size)
+        )
+        for record_id, *values in rows:
+            yield {'record_type': record_type, 'id': record_id, **dict(zip(names, values))}
+
+
+class Echo:
+    """File-like object whose write() returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=HISTORY_COLUMNS, restval='')
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+# Import
+
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+IMPORT_SERIALIZERS = {
+    'weight': (WeightRecordSerializer, 'weights_imported'),
+    'vaccination': (VaccinationSerializer, 'vaccinations_imported'),
+    'vet_visit': (VetVisitSerializer, 'vet_visits_imported'),
+}
+
+
+class ImportFileError(ValueError):
+    """An uploaded file that cannot be read as CSV past row `row`."""
+
+    def __init__(self, row, message):
+        super().__init__(message)
+        self.row = row
+
+
+def decode_lines(binary_lines, encoding='utf-8-sig'):
+    """Decode an uploaded file line by line, for csv readers."""
+    for line in binary_lines:
+        yield line.decode(encoding)
+
+
+def read_rows(lines):
+    """
+    (row_number, row) of the CSV data rows in `lines`, raising
+    ImportFileError with the row number for undecodable or malformed input.
+    """
+    reader = csv.DictReader(lines)
+    row_number = 0
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except UnicodeDecodeError:
+            raise ImportFileError(row_number + 1, 'The file is not valid UTF-8 text.')
+        except csv.Error as error:
+            raise ImportFileError(row_number + 1, f'The file is not valid CSV: {error}.')
+        row_number += 1
+        yield row_number, row
+
+
+def run_history_import(history_import, lines, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Import CSV rows in the export format into history_import.pet.
+
+    `lines` is read incrementally. Rows are validated with the record
+    serializers and inserted chunk by chunk; each chunk commits together with
+    the progress counters, and the rows_processed rows a previous run already
+    committed are skipped, so re-running an interrupted import resumes it.
+    Weight rows are upserted on (pet, date). Invalid rows are recorded in the
+    summary and do not stop the import; a file that cannot be read at all
+    from some row on fails the import with that row reported, and raises
+    ImportFileError.
+    """
+    rows = itertools.islice(read_rows(lines), history_import.rows_processed, None)
+    HistoryImport.objects.filter(pk=history_import.pk).update(status='running')
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                _import_chunk(history_import, chunk)
+    except ImportFileError as error:
+        # Rows of the unreadable chunk are not imported; earlier chunks are
+        history_import.status = 'failed'
+        history_import.error_count += 1
+        history_import.errors.append({'row': error.row, 'errors': {'file': [str(error)]}})
+        history_import.save()
+        raise
+    except Exception:
+        # Progress already committed for earlier chunks is kept
+        HistoryImport.objects.filter(pk=history_import.pk).update(status='failed')
+        history_import.refresh_from_db()
+        raise
+    history_import.status = 'completed'
+    history_import.save(update_fields=['status', 'updated_at'])
+    return history_import
+
+
+def _import_chunk(history_import, chunk):
+    errors = []
+    items_by_type = defaultdict(list)
+    for row_number, row in chunk:
+        record_type = (row.get('record_type') or '').strip()
+        if record_type not in IMPORT_SERIALIZERS:
+            errors.append((row_number, {
+                'record_type': [f'Unknown record type "{record_type}".'],
+            }))
+            continue
+        _, columns = HISTORY_TYPES[record_type]
+        # Empty cells fall back to the serializer defaults
+        data = {
+            field: row[column]
+            for column, field in columns.items()
+            if row.get(column) not in (None, '')
+        }
+        data['pet'] = history_import.pet_id
+        items_by_type[record_type].append((row_number, data))
+
+    for record_type, items in items_by_type.items():
+        serializer_class, counter = IMPORT_SERIALIZERS[record_type]
+        imported = _save_valid_items(serializer_class, items, errors)
+        setattr(history_import, counter, getattr(history_import, counter) + imported)
+
+    history_import.error_count += len(errors)
+    for row_number, row_errors in sorted(errors, key=lambda error: error[0]):
+        if len(history_import.errors) < MAX_REPORTED_ERRORS:
+            history_import.errors.append({'row': row_number, 'errors': row_errors})
+    history_import.rows_processed += len(chunk)
+    history_import.save()
+
+
+def _save_valid_items(serializer_class, items, errors):
+    """Save the valid (row_number, data) items; collect errors of the rest."""
+    context = {'upsert': True}
+    serializer = serializer_class(data=[data for _, data in items], many=True, context=context)
+    if not serializer.is_valid():
+        valid = []
+        for item, item_errors in zip(items, serializer.errors):
+            if item_errors:
+                errors.append((item[0], item_errors))
+            else:
+                valid.append(item)
+        if not valid:
+            return 0
+        items = valid
+        serializer = serializer_class(data=[data for _, data in items], many=True, context=context)
+        serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return len(items)
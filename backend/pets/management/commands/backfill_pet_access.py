@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from pets.access import rebuild_pet_access
+from pets.models import Pet
+
+
+class Command(BaseCommand):
+    help = "Rebuild the PetAccess visibility table from pet owners and shares."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="Number of pets rebuilt per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        pet_ids = Pet.objects.order_by('pk').values_list('pk', flat=True)
+        total = 0
+        last_id = 0
+        while True:
+            chunk = list(pet_ids.filter(pk__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            rebuild_pet_access(chunk)
+            total += len(chunk)
+            last_id = chunk[-1]
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt access rows for {total} pets."))
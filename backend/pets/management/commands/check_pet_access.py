@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from pets.access import find_pet_access_drift, rebuild_pet_access
+from pets.models import Pet
+
+
+class Command(BaseCommand):
+    help = "Check that the PetAccess visibility table matches pet owners and shares."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="Number of pets compared per batch.",
+        )
+        parser.add_argument(
+            '--fix', action='store_true',
+            help="Rebuild the access rows of pets found out of sync.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        pet_ids = Pet.objects.order_by('pk').values_list('pk', flat=True)
+        drifted_pets = set()
+        last_id = 0
+        while True:
+            chunk = list(pet_ids.filter(pk__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            for user_id, pet_id, expected, actual in find_pet_access_drift(chunk):
+                self.stdout.write(
+                    f"pet={pet_id} user={user_id} expected={expected} actual={actual}"
+                )
+                drifted_pets.add(pet_id)
+            last_id = chunk[-1]
+
+        if not drifted_pets:
+            self.stdout.write(self.style.SUCCESS("PetAccess is consistent."))
+            return
+        if options['fix']:
+            rebuild_pet_access(drifted_pets)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt access rows for {len(drifted_pets)} pets."))
+            return
+        raise CommandError(f"PetAccess is out of sync for {len(drifted_pets)} pets.")
@@ -0,0 +1,55 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from pets.history import IMPORT_CHUNK_SIZE, run_history_import
+from pets.models import Pet, HistoryImport
+
+
+class Command(BaseCommand):
+    help = "Import a pet's record history from a CSV file in the export format."
+
+    def add_arguments(self, parser):
+        parser.add_argument('pet_id', type=int)
+        parser.add_argument('csv_path')
+        parser.add_argument(
+            '--resume', type=int, metavar='IMPORT_ID',
+            help="Continue an interrupted import of the same file.",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+            help="Number of rows validated and committed per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            pet = Pet.objects.get(pk=options['pet_id'])
+        except Pet.DoesNotExist:
+            raise CommandError(f"Pet {options['pet_id']} does not exist.")
+
+        if options['resume']:
+            try:
+                history_import = HistoryImport.objects.get(pk=options['resume'], pet=pet)
+            except HistoryImport.DoesNotExist:
+                raise CommandError(f"Import {options['resume']} does not exist for this pet.")
+        else:
+            history_import = HistoryImport.objects.create(
+                pet=pet, source_name=os.path.basename(options['csv_path'])
+            )
+
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                run_history_import(history_import, csv_file, options['chunk_size'])
+        except Exception as exc:
+            raise CommandError(
+                f"Import {history_import.pk} failed after {history_import.rows_processed} rows "
+                f"({exc}). Re-run with --resume {history_import.pk} to continue."
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import {history_import.pk} completed: {history_import.rows_processed} rows, "
+            f"{history_import.weights_imported} weights, "
+            f"{history_import.vaccinations_imported} vaccinations, "
+            f"{history_import.vet_visits_imported} vet visits, "
+            f"{history_import.error_count} errors."
+        ))
+        for error in history_import.errors:
+            self.stdout.write(f"row {error['row']}: {error['errors']}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from pets.summaries import rebuild_pet_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the PetSummary dashboard rows from the pets' records."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="Number of pets rebuilt per transaction.",
+        )
+        parser.add_argument(
+            '--stale', action='store_true',
+            help="Only rebuild missing summaries and ones whose next due date or "
+                 "year-to-date spend has rolled over (run daily).",
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_pet_summaries(
+            chunk_size=options['chunk_size'], stale_only=options['stale']
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt summaries for {total} pets."))
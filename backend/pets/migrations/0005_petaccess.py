@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_pet_access(apps, schema_editor):
+    Pet = apps.get_model('pets', 'Pet')
+    PetShare = apps.get_model('pets', 'PetShare')
+    PetAccess = apps.get_model('pets', 'PetAccess')
+
+    rows = {}
+    for user_id, pet_id, role in PetShare.objects.values_list('shared_with_id', 'pet_id', 'role'):
+        rows[(user_id, pet_id)] = role
+    for user_id, pet_id in Pet.objects.filter(owner__isnull=False).values_list('owner_id', 'pk'):
+        rows[(user_id, pet_id)] = 'owner'
+    PetAccess.objects.bulk_create(
+        (PetAccess(user_id=user_id, pet_id=pet_id, role=role) for (user_id, pet_id), role in rows.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0004_petshare'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'Owner'), ('editor', 'Editor'), ('viewer', 'Viewer')], max_length=10)),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='pets.pet')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pet_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'pet')},
+            },
+        ),
+        migrations.RunPython(backfill_pet_access, migrations.RunPython.noop),
+    ]
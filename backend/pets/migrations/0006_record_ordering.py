@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0005_petaccess'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='vaccination',
+            options={'ordering': ['-date_administered', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='vetvisit',
+            options={'ordering': ['-date', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='weightrecord',
+            options={'ordering': ['-date', '-id']},
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0006_record_ordering'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['pet', '-date_administered', '-id'], name='vaccination_pet_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vetvisit',
+            index=models.Index(fields=['pet', '-date', '-id'], name='vetvisit_pet_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weightrecord',
+            index=models.Index(fields=['pet', '-date', '-id'], name='weightrecord_pet_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0007_record_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='petshare',
+            index=models.Index(fields=['shared_with', 'pet'], name='petshare_user_pet_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['due_date'], name='vaccination_due_date_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0008_lookup_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoryImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('rows_processed', models.PositiveIntegerField(default=0)),
+                ('weights_imported', models.PositiveIntegerField(default=0)),
+                ('vaccinations_imported', models.PositiveIntegerField(default=0)),
+                ('vet_visits_imported', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pet_imports', to=settings.AUTH_USER_MODEL)),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='imports', to='pets.pet')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
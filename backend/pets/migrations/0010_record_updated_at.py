@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:37
+
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    for model_name in ('WeightRecord', 'Vaccination', 'VetVisit'):
+        model = apps.get_model('pets', model_name)
+        model.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0009_historyimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vaccination',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='vetvisit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='weightrecord',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
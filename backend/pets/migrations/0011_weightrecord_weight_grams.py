@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+from django.db import migrations, models, transaction
+from django.db.models.functions import Cast, Round
+
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def backfill_weight_grams(apps, schema_editor):
+    """Fill weight_grams in primary key chunks, one transaction per chunk."""
+    WeightRecord = apps.get_model('pets', 'WeightRecord')
+    grams = Cast(
+        Round(
+            models.F('weight') * models.Case(
+                models.When(unit='lb', then=models.Value(Decimal('453.59237'))),
+                default=models.Value(Decimal('1000')),
+            )
+        ),
+        models.IntegerField(),
+    )
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                WeightRecord.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:BACKFILL_CHUNK_SIZE]
+            )
+            if not ids:
+                break
+            WeightRecord.objects.filter(pk__in=ids).update(weight_grams=grams)
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    # Each backfill chunk commits on its own instead of one long transaction
+    atomic = False
+
+    dependencies = [
+        ('pets', '0010_record_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weightrecord',
+            name='weight_grams',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_weight_grams, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='weightrecord',
+            index=models.Index(fields=['weight_grams'], name='weightrecord_grams_idx'),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:01
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def backfill_pet_summaries(apps, schema_editor):
+    # A frozen copy of pets.summaries.refresh_pet_summaries() as of this
+    # migration, on the historical models
+    Pet = apps.get_model('pets', 'Pet')
+    PetSummary = apps.get_model('pets', 'PetSummary')
+    WeightRecord = apps.get_model('pets', 'WeightRecord')
+    Vaccination = apps.get_model('pets', 'Vaccination')
+    VetVisit = apps.get_model('pets', 'VetVisit')
+
+    def aggregate(queryset, value):
+        return Subquery(
+            queryset.filter(pet=OuterRef('pk'))
+            .order_by()
+            .values('pet')
+            .annotate(value=value)
+            .values('value')
+        )
+
+    today = timezone.localdate()
+    now = timezone.now()
+    latest_weight = WeightRecord.objects.filter(pet=OuterRef('pk')).order_by('-date', '-id')
+    pets = Pet.objects.order_by('pk').values_list('pk').annotate(
+        latest_weight=Subquery(latest_weight.values('weight')[:1]),
+        latest_weight_unit=Coalesce(Subquery(latest_weight.values('unit')[:1]), Value('')),
+        latest_weight_date=Subquery(latest_weight.values('date')[:1]),
+        weight_record_count=Coalesce(aggregate(WeightRecord.objects, Count('pk')), 0),
+        vaccination_count=Coalesce(aggregate(Vaccination.objects, Count('pk')), 0),
+        vet_visit_count=Coalesce(aggregate(VetVisit.objects, Count('pk')), 0),
+        last_vet_visit_date=aggregate(VetVisit.objects, Max('date')),
+        next_vaccination_due=aggregate(
+            Vaccination.objects.filter(due_date__gte=today), Min('due_date')
+        ),
+        vet_spend_ytd=Coalesce(
+            aggregate(VetVisit.objects.filter(date__year=today.year), Sum('cost')),
+            Value(Decimal('0.00')),
+        ),
+    )
+    names = [
+        'pet_id',
+        'latest_weight',
+        'latest_weight_unit',
+        'latest_weight_date',
+        'weight_record_count',
+        'vaccination_count',
+        'vet_visit_count',
+        'last_vet_visit_date',
+        'next_vaccination_due',
+        'vet_spend_ytd',
+    ]
+    last_id = 0
+    while True:
+        rows = list(pets.filter(pk__gt=last_id)[:1000])
+        if not rows:
+            break
+        PetSummary.objects.bulk_create(
+            [
+                PetSummary(**dict(zip(names, row)), vet_spend_year=today.year, refreshed_at=now)
+                for row in rows
+            ]
+        )
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0011_weightrecord_weight_grams'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetSummary',
+            fields=[
+                ('pet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='pets.pet')),
+                ('latest_weight', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('latest_weight_unit', models.CharField(blank=True, max_length=5)),
+                ('latest_weight_date', models.DateField(blank=True, null=True)),
+                ('weight_record_count', models.PositiveIntegerField(default=0)),
+                ('vaccination_count', models.PositiveIntegerField(default=0)),
+                ('vet_visit_count', models.PositiveIntegerField(default=0)),
+                ('last_vet_visit_date', models.DateField(blank=True, null=True)),
+                ('next_vaccination_due', models.DateField(blank=True, null=True)),
+                ('vet_spend_ytd', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('vet_spend_year', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_pet_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0012_petsummary'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='vaccination',
+            name='vaccination_due_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['due_date', 'id'], name='vaccination_due_date_id_idx'),
+        ),
+    ]
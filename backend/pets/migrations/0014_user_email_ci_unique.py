@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Case-insensitive unique index on non-blank user emails. Registration
+    relies on it (see RegisterSerializer.UNIQUE_ERRORS) instead of checking
+    for duplicates first; existing duplicates must be resolved before
+    migrating.
+    """
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('pets', '0013_vaccination_due_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX pets_user_email_upper_uniq ON auth_user (UPPER(email)) WHERE email <> ''",
+            'DROP INDEX pets_user_email_upper_uniq',
+        ),
+    ]
@@ -2,7 +2,27 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
-from decimal import Decimal
+from django.db.models.functions import Cast
+from decimal import Decimal, ROUND_HALF_UP
+
+# Grams per weight unit. WeightRecord.weight_grams holds every weight in
+# grams so that aggregates and ordering by mass can run in SQL.
+GRAMS_PER_UNIT = {
+    'g': Decimal('1'),
+    'kg': Decimal('1000'),
+    'lb': Decimal('453.59237'),
+}
+
+
+def weight_to_grams(weight, unit):
+    """Convert a weight in `unit` to whole grams."""
+    grams = Decimal(weight) * GRAMS_PER_UNIT[unit]
+    return int(grams.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def grams_in(unit):
+    """Expression of WeightRecord.weight_grams converted to `unit`, as a float."""
+    return Cast('weight_grams', models.FloatField()) / models.Value(float(GRAMS_PER_UNIT[unit]))
 
 
 class Pet(models.Model):
@@ -36,6 +56,25 @@ class Pet(models.Model):
         return self.name
 
 
+class WeightRecordQuerySet(models.QuerySet):
+    # Fields weight_grams is derived from; an upsert writes all of them
+    # together so the stored grams always match weight and unit.
+    MASS_FIELDS = {'weight', 'unit', 'weight_grams'}
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.set_weight_grams()
+        update_fields = kwargs.get('update_fields')
+        if update_fields and self.MASS_FIELDS & set(update_fields):
+            kwargs['update_fields'] = sorted(self.MASS_FIELDS | set(update_fields))
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def with_weight_in(self, unit, name='converted_weight'):
+        """Annotate each record with its weight converted to `unit`."""
+        return self.annotate(**{name: grams_in(unit)})
+
+
 class WeightRecord(models.Model):
     pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='weight_records')
     date = models.DateField()
@@ -49,16 +88,38 @@ class WeightRecord(models.Model):
         choices=[('kg', 'Kilograms'), ('lb', 'Pounds')],
         default='kg'
     )
+    # Canonical mass, kept in line with weight/unit on save and bulk_create
+    weight_grams = models.PositiveIntegerField(null=True, editable=False)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = WeightRecordQuerySet.as_manager()
     
     class Meta:
-        ordering = ['-date']
+        ordering = ['-date', '-id']
         unique_together = ['pet', 'date']
+        indexes = [
+            # Serves per-pet listings and keyset pagination on (date, id)
+            models.Index(fields=['pet', '-date', '-id'], name='weightrecord_pet_date_idx'),
+            # Sorting and cross-pet comparisons by actual mass
+            models.Index(fields=['weight_grams'], name='weightrecord_grams_idx'),
+        ]
     
     def __str__(self):
         return f"{self.pet.name} - {self.weight}{self.unit} on {self.date}"
 
+    def set_weight_grams(self):
+        if self.weight is not None and self.unit in GRAMS_PER_UNIT:
+            self.weight_grams = weight_to_grams(self.weight, self.unit)
+
+    def save(self, *args, **kwargs):
+        self.set_weight_grams()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'weight', 'unit'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'weight_grams'}
+        super().save(*args, **kwargs)
+
 
 class Vaccination(models.Model):
     pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='vaccinations')
@@ -68,9 +129,15 @@ class Vaccination(models.Model):
     veterinarian = models.CharField(max_length=200, blank=True)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-date_administered']
+        ordering = ['-date_administered', '-id']
+        indexes = [
+            models.Index(fields=['pet', '-date_administered', '-id'], name='vaccination_pet_date_idx'),
+            # Due-date range scans in (due_date, id) keyset order
+            models.Index(fields=['due_date', 'id'], name='vaccination_due_date_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.pet.name} - {self.vaccine_name} on {self.date_administered}"
@@ -90,9 +157,13 @@ class VetVisit(models.Model):
         validators=[MinValueValidator(Decimal('0.00'))]
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-date']
+        ordering = ['-date', '-id']
+        indexes = [
+            models.Index(fields=['pet', '-date', '-id'], name='vetvisit_pet_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.pet.name} - {self.reason} on {self.date}"
@@ -111,10 +182,100 @@ class PetShare(models.Model):
     class Meta:
         unique_together = ['pet', 'shared_with']
         ordering = ['created_at']
+        indexes = [
+            # Shares of a user, for role and visibility lookups
+            models.Index(fields=['shared_with', 'pet'], name='petshare_user_pet_idx'),
+        ]
 
     def clean(self):
         if self.pet.owner == self.shared_with:
             raise ValidationError("Cannot share a pet with its owner.")
 
     def __str__(self):
-        return f"{self.pet.name} shared with {self.shared_with.username} ({self.role})"
\ No newline at end of file
+        return f"{self.pet.name} shared with {self.shared_with.username} ({self.role})"
+
+class PetAccess(models.Model):
+    """
+    Denormalized visibility table with one row per (user, pet) the user can
+    access, covering both ownership and shares. Kept in sync by the signal
+    handlers in pets.signals; see the backfill_pet_access and
+    check_pet_access management commands for repair.
+    """
+    ROLE_CHOICES = [
+        ('owner', 'Owner'),
+        ('editor', 'Editor'),
+        ('viewer', 'Viewer'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pet_access')
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='access')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+
+    class Meta:
+        unique_together = ['user', 'pet']
+
+    def __str__(self):
+        return f"{self.user.username} -> {self.pet.name} ({self.role})"
+
+
+class PetSummary(models.Model):
+    """
+    Dashboard figures of a pet, refreshed from its records in the same
+    transaction as every record write (see pets.summaries). Rebuild with
+    the rebuild_pet_summaries management command.
+
+    next_vaccination_due and vet_spend_ytd depend on the current date; a
+    daily `rebuild_pet_summaries --stale` rolls them forward.
+    """
+    pet = models.OneToOneField(
+        Pet, on_delete=models.CASCADE, primary_key=True, related_name='summary'
+    )
+    latest_weight = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    latest_weight_unit = models.CharField(max_length=5, blank=True)
+    latest_weight_date = models.DateField(null=True, blank=True)
+    weight_record_count = models.PositiveIntegerField(default=0)
+    vaccination_count = models.PositiveIntegerField(default=0)
+    vet_visit_count = models.PositiveIntegerField(default=0)
+    last_vet_visit_date = models.DateField(null=True, blank=True)
+    next_vaccination_due = models.DateField(null=True, blank=True)
+    vet_spend_ytd = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    # Calendar year vet_spend_ytd was computed for
+    vet_spend_year = models.PositiveSmallIntegerField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary of {self.pet.name}"
+
+
+class HistoryImport(models.Model):
+    """
+    Progress and summary of a CSV history import into a pet. Rows are
+    committed in chunks together with rows_processed, so an interrupted
+    import can be resumed from the first uncommitted row.
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='imports')
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='pet_imports'
+    )
+    source_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    rows_processed = models.PositiveIntegerField(default=0)
+    weights_imported = models.PositiveIntegerField(default=0)
+    vaccinations_imported = models.PositiveIntegerField(default=0)
+    vet_visits_imported = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import into {self.pet.name} ({self.status}, {self.rows_processed} rows)"
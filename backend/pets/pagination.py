@@ -0,0 +1,161 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Base of the keyset paginations that fetch their own pages.
+
+    The cursor holds the key of the last item of the page; subclasses
+    decode it for the page fetcher and encode it from an item.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.GET[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_key(self, key):
+        raise NotImplementedError
+
+    def encode_key(self, item):
+        raise NotImplementedError
+
+    def decode_cursor(self, request):
+        encoded = request.GET.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            return self.decode_key(json.loads(urlsafe_b64decode(encoded)))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, item):
+        encoded = urlsafe_b64encode(json.dumps(self.encode_key(item)).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _start_page(self, request):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        return self.page_size + 1, self.decode_cursor(request)
+
+    def _end_page(self, items):
+        self.next_item = items[self.page_size - 1] if len(items) > self.page_size else None
+        return items[:self.page_size]
+
+    def paginate(self, fetch_page, request):
+        """
+        Return one page of items from fetch_page(limit, cursor), fetching
+        one extra item to tell whether a next page exists.
+        """
+        return self._end_page(fetch_page(*self._start_page(request)))
+
+    async def apaginate(self, fetch_page, request):
+        """paginate() for an async fetch_page."""
+        return self._end_page(await fetch_page(*self._start_page(request)))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.encode_cursor(self.next_item) if self.next_item else None,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class TimelinePagination(KeysetPagination):
+    """
+    Keyset pagination over the (event_date, type, id) timeline order.
+
+    The next page is fetched with the key of the last event pushed into
+    every UNION ALL branch.
+    """
+
+    def decode_key(self, key):
+        event_date, event_type, event_id = key
+        return date.fromisoformat(event_date), str(event_type), int(event_id)
+
+    def encode_key(self, event):
+        return [event['event_date'].isoformat(), event['type'], event['id']]
+
+
+class RecordKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for the record endpoints, on a (date field, id)
+    ordering, descending unless the date field is listed without "-".
+
+    The next page is the records strictly past the last one of the page
+    in (date, id) order, so records sharing a date page like any others,
+    and every page is an index range scan from the cursor however deep it
+    is. No COUNT(*) is run.
+    """
+    page_size = api_settings.PAGE_SIZE
+    ordering = None
+
+    @property
+    def date_field(self):
+        return self.ordering[0].lstrip('-')
+
+    @property
+    def descending(self):
+        return self.ordering[0].startswith('-')
+
+    def decode_key(self, key):
+        record_date, record_id = key
+        return date.fromisoformat(record_date), int(record_id)
+
+    def encode_key(self, record):
+        return [getattr(record, self.date_field).isoformat(), record.id]
+
+    def filter_after(self, queryset, cursor):
+        """Order `queryset` by the pagination key, after `cursor` if given."""
+        field = self.date_field
+        if cursor is not None:
+            record_date, record_id = cursor
+            past = 'lt' if self.descending else 'gt'
+            # The redundant bound on the date alone lets the scan start at
+            # the cursor; the OR completes the (date, id) row comparison
+            queryset = queryset.filter(**{f'{field}__{past}e': record_date}).filter(
+                Q(**{f'{field}__{past}': record_date}) | Q(**{f'id__{past}': record_id})
+            )
+        return queryset.order_by(*self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate(
+            lambda limit, cursor: list(self.filter_after(queryset, cursor)[:limit]),
+            request,
+        )
+
+
+class WeightRecordPagination(RecordKeysetPagination):
+    ordering = ('-date', '-id')
+
+
+class VaccinationPagination(RecordKeysetPagination):
+    ordering = ('-date_administered', '-id')
+
+
+class VetVisitPagination(RecordKeysetPagination):
+    ordering = ('-date', '-id')
+
+
+class VaccinationDuePagination(RecordKeysetPagination):
+    ordering = ('due_date', 'id')
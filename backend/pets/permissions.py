@@ -1,5 +1,6 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from .models import Pet, PetShare
+from .models import Pet
+from .access import get_pet_role, OWNER, EDITOR, VIEWER
 
 class PetAccessPermission(BasePermission):
     """
@@ -10,24 +11,19 @@ class PetAccessPermission(BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        pet = obj if isinstance(obj, Pet) else obj.pet
-        user = request.user
+        pet = obj if isinstance(obj, Pet) else obj.pet_id
+        role = get_pet_role(request, pet)
 
         # Owner has full access
-        if pet.owner == user:
+        if role == OWNER:
             return True
 
-        # Get share role
-        share = PetShare.objects.filter(pet=pet, shared_with=user).first()
-        if not share:
-            return False
-
         # Viewer: read-only
-        if share.role == 'viewer':
+        if role == VIEWER:
             return request.method in SAFE_METHODS
 
         # Editor
-        if share.role == 'editor':
+        if role == EDITOR:
             if isinstance(obj, Pet):
                 # Editors can read the pet, but cannot edit or delete it
                 return request.method in SAFE_METHODS
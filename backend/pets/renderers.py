@@ -0,0 +1,40 @@
+import csv
+import io
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Selects CSV for ?format=csv. Successful exports stream their own body,
+    so this only renders error payloads, as a one-row CSV document.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, dict):
+            data = {'detail': data}
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(data))
+        writer.writeheader()
+        writer.writerow({key: str(value) for key, value in data.items()})
+        return buffer.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Selects newline-delimited JSON for ?format=ndjson. Like CSVRenderer it
+    only renders error payloads, as a single JSON line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data) + '\n').encode(self.charset)
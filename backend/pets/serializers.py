@@ -1,7 +1,19 @@
+from collections import defaultdict
 from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
-from .models import Pet, WeightRecord, Vaccination, VetVisit, PetShare
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import (
+    Pet, WeightRecord, Vaccination, VetVisit, PetShare, HistoryImport, PetSummary, GRAMS_PER_UNIT,
+)
+from .access import get_pet_role
+from .hashing import authenticate_user, hash_password
+from .signals import records_bulk_saved
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -12,22 +24,27 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class RegisterSerializer(serializers.ModelSerializer):
+    """
+    Registers a user and creates their token in one transaction.
+
+    Duplicates are not looked up beforehand: the unique constraints on
+    username and (case-insensitively) email reject them, and the violated
+    constraint is mapped to the field error in UNIQUE_ERRORS.
+    """
+
     password = serializers.CharField(write_only=True, min_length=8, style={'input_type': 'password'})
     password_confirm = serializers.CharField(write_only=True, min_length=8, style={'input_type': 'password'})
 
+    UNIQUE_ERRORS = {
+        'auth_user_username_key': {'username': ["A user with this username already exists."]},
+        'pets_user_email_upper_uniq': {'email': ["A user with this email already exists."]},
+    }
+
     class Meta:
         model = User
         fields = ['username', 'email', 'password', 'password_confirm', 'first_name', 'last_name']
-
-    def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("A user with this username already exists.")
-        return value
-
-    def validate_email(self, value):
-        if value and User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
+        # Without the UniqueValidator; the database enforces uniqueness
+        extra_kwargs = {'username': {'validators': [User.username_validator]}}
 
     def validate(self, data):
         if data.get('password') != data.get('password_confirm'):
@@ -36,7 +53,21 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        # Hash on the bounded pool rather than in create_user(), and before
+        # the transaction starts
+        password = hash_password(validated_data.pop('password'))
+        user = User(**validated_data, password=password)
+        user.username = User.normalize_username(user.username)
+        user.email = User.objects.normalize_email(user.email)
+        try:
+            with transaction.atomic():
+                user.save()
+                Token.objects.create(user=user)
+        except IntegrityError as error:
+            constraint = getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+            if constraint not in self.UNIQUE_ERRORS:
+                raise
+            raise serializers.ValidationError(self.UNIQUE_ERRORS[constraint])
         return user
 
 
@@ -49,11 +80,9 @@ class LoginSerializer(serializers.Serializer):
         password = data.get('password')
 
         if username and password:
-            user = authenticate(username=username, password=password)
+            user = authenticate_user(username, password)
             if not user:
                 raise serializers.ValidationError("Invalid username or password.")
-            if not user.is_active:
-                raise serializers.ValidationError("User account is disabled.")
             data['user'] = user
         else:
             raise serializers.ValidationError("Must include username and password.")
@@ -61,27 +90,224 @@ class LoginSerializer(serializers.Serializer):
         return data
 
 
-class WeightRecordSerializer(serializers.ModelSerializer):
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that resolves each distinct key once per serializer
+    instance, so a batch of records for the same pet loads that pet once.
+    """
+
+    def to_internal_value(self, data):
+        resolved = self.__dict__.setdefault('_resolved', {})
+        key = str(data)
+        if key not in resolved:
+            resolved[key] = super().to_internal_value(data)
+        return resolved[key]
+
+
+class BulkRecordListSerializer(serializers.ListSerializer):
+    """
+    List serializer for batches of records.
+
+    Uniqueness (Meta.unique_together) is checked for the whole batch with one
+    query rather than per item, and creation is a single bulk INSERT. Errors
+    are reported per item, aligned with the submitted array.
+    """
+
+    def to_internal_value(self, data):
+        validated = super().to_internal_value(data)
+        # Upserts overwrite existing rows, but a batch may still only
+        # touch each row once.
+        errors = self.unique_together_errors(
+            validated, check_existing=not self.child.is_upsert
+        )
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def unique_together_errors(self, validated, check_existing=True):
+        model = self.child.Meta.model
+        errors = [{} for _ in validated]
+        for fields in model._meta.unique_together:
+            keys = [
+                tuple(getattr(attrs.get(field), 'pk', attrs.get(field)) for field in fields)
+                for attrs in validated
+            ]
+            existing = set()
+            if check_existing:
+                lookup = {
+                    f'{field}__in': {key[i] for key in keys}
+                    for i, field in enumerate(fields)
+                }
+                existing = set(model.objects.filter(**lookup).values_list(*fields))
+            seen = {}
+            for index, key in enumerate(keys):
+                if key in existing:
+                    message = f"The fields {', '.join(fields)} must make a unique set."
+                elif key in seen:
+                    message = f"Duplicates item {seen[key]} in this batch."
+                else:
+                    seen[key] = index
+                    continue
+                errors[index].setdefault(api_settings.NON_FIELD_ERRORS_KEY, []).append(message)
+        return errors
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        if self.child.is_upsert:
+            instances = self.child.upsert(validated_data)
+            created = ()
+        else:
+            instances = created = model.objects.bulk_create(
+                [model(**attrs) for attrs in validated_data]
+            )
+        records_bulk_saved.send(
+            sender=model,
+            pet_ids={instance.pet_id for instance in instances},
+            created=created,
+        )
+        return instances
+
+
+class PetRecordSerializer(serializers.ModelSerializer):
+    """Base serializer for records that belong to a pet."""
+
+    pet = CachedPrimaryKeyRelatedField(queryset=Pet.objects.all())
+
+    # Unique fields a create may upsert on (INSERT ... ON CONFLICT DO UPDATE)
+    # when the view passes upsert=True in the context.
+    upsert_fields = None
+
+    @property
+    def is_upsert(self):
+        return bool(self.upsert_fields and self.context.get('upsert'))
+
+    def upsert_options(self, fields):
+        """bulk_create() arguments upserting rows that sent `fields`."""
+        update_fields = set(fields)
+        # auto_now columns (updated_at) must be refreshed on conflict too
+        update_fields.update(
+            field.name for field in self.Meta.model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+        )
+        return {
+            'update_conflicts': True,
+            'unique_fields': list(self.upsert_fields),
+            'update_fields': sorted(update_fields - set(self.upsert_fields)),
+        }
+
+    def upsert(self, items):
+        """
+        Upsert validated `items` and return the stored rows in item order.
+
+        Items are written with one statement per set of submitted fields,
+        so a conflict only overwrites the fields its own item sent. The rows
+        are then read back, as an updated row keeps its stored values for
+        the other fields (and its created_at).
+        """
+        model = self.Meta.model
+        groups = defaultdict(list)
+        for index, attrs in enumerate(items):
+            groups[frozenset(attrs)].append(index)
+        pks = [None] * len(items)
+        for fields, indexes in groups.items():
+            saved = model.objects.bulk_create(
+                [model(**items[index]) for index in indexes], **self.upsert_options(fields)
+            )
+            for index, instance in zip(indexes, saved):
+                pks[index] = instance.pk
+        stored = model.objects.in_bulk(pks)
+        return [stored[pk] for pk in pks]
+
+    def create(self, validated_data):
+        if not self.is_upsert:
+            return super().create(validated_data)
+        [instance] = self.upsert([validated_data])
+        records_bulk_saved.send(sender=self.Meta.model, pet_ids={instance.pet_id})
+        return instance
+
+    def get_validators(self):
+        validators = super().get_validators()
+        if self.is_upsert or isinstance(self.parent, BulkRecordListSerializer):
+            # Upserts resolve conflicts in the database, and the list
+            # serializer checks uniqueness for the whole batch
+            validators = [
+                validator for validator in validators
+                if not isinstance(validator, UniqueTogetherValidator)
+            ]
+        return validators
+
+
+class WeightRecordSerializer(PetRecordSerializer):
+    upsert_fields = ('pet', 'date')
+
     class Meta:
         model = WeightRecord
-        fields = ['id', 'pet', 'date', 'weight', 'unit', 'notes', 'created_at']
-        read_only_fields = ['created_at']
+        fields = ['id', 'pet', 'date', 'weight', 'unit', 'weight_grams', 'notes', 'created_at']
+        read_only_fields = ['weight_grams', 'created_at']
+        list_serializer_class = BulkRecordListSerializer
+
+    def get_weight_unit(self):
+        """Unit requested with ?weight_unit= for converted_weight, if any."""
+        request = self.context.get('request')
+        unit = request.query_params.get('weight_unit') if request else None
+        if unit is not None and unit not in GRAMS_PER_UNIT:
+            raise serializers.ValidationError(
+                {'weight_unit': [f"Must be one of: {', '.join(GRAMS_PER_UNIT)}."]}
+            )
+        return unit
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        unit = self.get_weight_unit()
+        if unit and instance.weight_grams is not None:
+            data['converted_weight'] = {
+                'value': round(instance.weight_grams / float(GRAMS_PER_UNIT[unit]), 2),
+                'unit': unit,
+            }
+        return data
 
 
-class VaccinationSerializer(serializers.ModelSerializer):
+class VaccinationSerializer(PetRecordSerializer):
     class Meta:
         model = Vaccination
         fields = ['id', 'pet', 'vaccine_name', 'date_administered', 'due_date', 
                   'veterinarian', 'notes', 'created_at']
         read_only_fields = ['created_at']
+        list_serializer_class = BulkRecordListSerializer
+
+
+class VaccinationDueSerializer(VaccinationSerializer):
+    pet_name = serializers.CharField(source='pet.name', read_only=True)
+
+    class Meta(VaccinationSerializer.Meta):
+        fields = VaccinationSerializer.Meta.fields + ['pet_name']
 
 
-class VetVisitSerializer(serializers.ModelSerializer):
+class VetVisitSerializer(PetRecordSerializer):
     class Meta:
         model = VetVisit
         fields = ['id', 'pet', 'date', 'reason', 'veterinarian', 'notes', 
                   'cost', 'created_at']
         read_only_fields = ['created_at']
+        list_serializer_class = BulkRecordListSerializer
+
+class TimelineEventSerializer(serializers.Serializer):
+    """One weight record, vaccination or vet visit on a pet's timeline."""
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    event_date = serializers.DateField()
+    title = serializers.CharField()
+    details = serializers.CharField()
+
+
+class HistoryImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HistoryImport
+        fields = ['id', 'pet', 'source_name', 'status', 'rows_processed',
+                  'weights_imported', 'vaccinations_imported', 'vet_visits_imported',
+                  'error_count', 'errors', 'created_at', 'updated_at']
+        read_only_fields = fields
+
 
 class PetShareSerializer(serializers.ModelSerializer):
     shared_with_username = serializers.CharField(source='shared_with.username', read_only=True)
@@ -124,56 +350,117 @@ class PetShareSerializer(serializers.ModelSerializer):
         return PetShare.objects.create(**validated_data)
 
 
-class PetSerializer(serializers.ModelSerializer):
-    weight_records = WeightRecordSerializer(many=True, read_only=True)
-    vaccinations = VaccinationSerializer(many=True, read_only=True)
-    vet_visits = VetVisitSerializer(many=True, read_only=True)
-    owner_username = serializers.CharField(source='owner.username', read_only=True)
-    is_shared = serializers.SerializerMethodField()
-    user_role = serializers.SerializerMethodField()
-    shared_with = PetShareSerializer(source='shares', many=True, read_only=True)
+class PetAccessFieldsMixin:
+    """
+    Read owner_username, is_shared and user_role from the annotations added by
+    PetViewSet.get_queryset, falling back to lookups for unannotated instances
+    (e.g. a freshly created pet).
+    """
 
-    class Meta:
-        model = Pet
-        fields = ['id', 'name', 'species', 'breed', 'birth_date', 'photo', 'notes', 'owner_username', 'created_at', 'updated_at', 'weight_records', 'vaccinations', 'vet_visits', 'is_shared', 'user_role', 'shared_with']
-        read_only_fields = ['created_at', 'updated_at', 'owner_username']
+    def get_owner_username(self, obj):
+        if hasattr(obj, 'owner_username'):
+            return obj.owner_username
+        return obj.owner.username if obj.owner_id else None
 
     def get_is_shared(self, obj):
+        if hasattr(obj, 'is_shared'):
+            return obj.is_shared
         request = self.context.get('request')
         if request and request.user:
             return obj.owner != request.user
         return False
 
     def get_user_role(self, obj):
+        if hasattr(obj, 'user_role'):
+            return obj.user_role
         request = self.context.get('request')
         if not request or not request.user:
             return None
-        if obj.owner == request.user:
-            return 'owner'
-        share = obj.shares.filter(shared_with=request.user).first()
-        return share.role if share else None
+        return get_pet_role(request, obj)
 
 
-class PetListSerializer(serializers.ModelSerializer):
-    owner_username = serializers.CharField(source='owner.username', read_only=True)
+class PetSerializer(PetAccessFieldsMixin, serializers.ModelSerializer):
+    weight_records = serializers.SerializerMethodField()
+    vaccinations = serializers.SerializerMethodField()
+    vet_visits = serializers.SerializerMethodField()
+    record_counts = serializers.SerializerMethodField()
+    record_links = serializers.SerializerMethodField()
+    owner_username = serializers.SerializerMethodField()
     is_shared = serializers.SerializerMethodField()
     user_role = serializers.SerializerMethodField()
+    shared_with = PetShareSerializer(source='shares', many=True, read_only=True)
 
     class Meta:
         model = Pet
-        fields = ['id', 'name', 'species', 'breed', 'birth_date', 'photo', 'owner_username', 'created_at', 'is_shared', 'user_role']
+        fields = ['id', 'name', 'species', 'breed', 'birth_date', 'photo', 'notes', 'owner_username', 'created_at', 'updated_at', 'weight_records', 'vaccinations', 'vet_visits', 'record_counts', 'record_links', 'is_shared', 'user_role', 'shared_with']
+        read_only_fields = ['created_at', 'updated_at', 'owner_username']
 
-    def get_is_shared(self, obj):
+    # Only the most recent PET_DETAIL_RECORD_LIMIT records of each type are
+    # embedded; record_counts and record_links point to the full history.
+    RECORD_TYPES = {
+        'weight_records': (WeightRecordSerializer, 'weightrecord-list'),
+        'vaccinations': (VaccinationSerializer, 'vaccination-list'),
+        'vet_visits': (VetVisitSerializer, 'vetvisit-list'),
+    }
+
+    def _recent_records(self, obj, name):
+        records = getattr(obj, f'recent_{name}', None)
+        if records is None:
+            records = getattr(obj, name).all()[:settings.PET_DETAIL_RECORD_LIMIT]
+        serializer_class, _ = self.RECORD_TYPES[name]
+        return serializer_class(records, many=True, context=self.context).data
+
+    def get_weight_records(self, obj):
+        return self._recent_records(obj, 'weight_records')
+
+    def get_vaccinations(self, obj):
+        return self._recent_records(obj, 'vaccinations')
+
+    def get_vet_visits(self, obj):
+        return self._recent_records(obj, 'vet_visits')
+
+    def get_record_counts(self, obj):
+        counts = {}
+        for name in self.RECORD_TYPES:
+            count = getattr(obj, f'{name}_count', None)
+            counts[name] = count if count is not None else getattr(obj, name).count()
+        return counts
+
+    def get_record_links(self, obj):
         request = self.context.get('request')
-        if request and request.user:
-            return obj.owner != request.user
-        return False
+        links = {}
+        for name, (_, url_name) in self.RECORD_TYPES.items():
+            links[name] = f"{reverse(url_name, request=request)}?pet={obj.pk}"
+        return links
 
-    def get_user_role(self, obj):
-        request = self.context.get('request')
-        if not request or not request.user:
-            return None
-        if obj.owner == request.user:
-            return 'owner'
-        share = obj.shares.filter(shared_with=request.user).first()
-        return share.role if share else None
\ No newline at end of file
+
+class PetSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PetSummary
+        fields = [
+            'latest_weight', 'latest_weight_unit', 'latest_weight_date',
+            'weight_record_count', 'vaccination_count', 'vet_visit_count',
+            'last_vet_visit_date', 'next_vaccination_due', 'vet_spend_ytd',
+        ]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        today = timezone.localdate()
+        # Date-dependent figures not yet rolled over by a rebuild
+        if instance.vet_spend_year != today.year:
+            data['vet_spend_ytd'] = '0.00'
+        if instance.next_vaccination_due and instance.next_vaccination_due < today:
+            data['next_vaccination_due'] = None
+        return data
+
+
+class PetListSerializer(PetAccessFieldsMixin, serializers.ModelSerializer):
+    owner_username = serializers.SerializerMethodField()
+    is_shared = serializers.SerializerMethodField()
+    user_role = serializers.SerializerMethodField()
+    # Loaded with select_related('summary') by the list view
+    summary = PetSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Pet
+        fields = ['id', 'name', 'species', 'breed', 'birth_date', 'photo', 'owner_username', 'created_at', 'is_shared', 'user_role', 'summary']
@@ -0,0 +1,169 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.contrib.auth.models import User
+from django.dispatch import Signal, receiver
+from rest_framework.authtoken.models import Token
+from django.utils import timezone
+from .models import Pet, PetShare, WeightRecord, Vaccination, VetVisit
+from .access import sync_owner_access, sync_share_access
+from .authentication import token_cache
+from .summaries import add_records_to_summaries, refresh_pet_summaries
+from .versions import bump_pet_data_versions
+
+# Sent with sender=<record model> and pet_ids=<set of pet ids> after records
+# are written with bulk_create(), which does not send post_save, and with
+# created=<the records> when they were all inserted rather than upserted.
+records_bulk_saved = Signal()
+
+
+# PetAccess maintenance
+
+
+@receiver(post_save, sender=Pet)
+def pet_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    former_owners = sync_owner_access(instance, created=created)
+    # Bumped here rather than in the data version handlers, as a former
+    # owner has already left PetAccess
+    bump_pet_data_versions([instance.pk], former_owners)
+
+
+@receiver(post_save, sender=PetShare)
+def pet_share_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sync_share_access(instance)
+
+
+@receiver(post_delete, sender=PetShare)
+def pet_share_deleted(sender, instance, **kwargs):
+    sync_share_access(instance, deleted=True)
+
+
+# Last-Modified validators
+
+
+def _deleting_pet(origin):
+    return isinstance(origin, Pet) or getattr(origin, 'model', None) is Pet
+
+
+def _touch_pets(pet_ids):
+    Pet.objects.filter(pk__in=pet_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=WeightRecord)
+@receiver(post_save, sender=Vaccination)
+@receiver(post_save, sender=VetVisit)
+@receiver(post_save, sender=PetShare)
+def touch_pet_on_save(sender, instance, raw=False, **kwargs):
+    # Record listings take Last-Modified from their pets alone, and shares
+    # have no updated_at of their own to show a role change
+    if not raw:
+        _touch_pets([instance.pet_id])
+
+
+@receiver(records_bulk_saved)
+def touch_pets_on_bulk_save(sender, pet_ids, **kwargs):
+    _touch_pets(pet_ids)
+
+
+@receiver(post_delete, sender=WeightRecord)
+@receiver(post_delete, sender=Vaccination)
+@receiver(post_delete, sender=VetVisit)
+@receiver(post_delete, sender=PetShare)
+def touch_pet_on_delete(sender, instance, origin=None, **kwargs):
+    # A deletion leaves no newer timestamp behind, so advance the pet's
+    # updated_at to keep Last-Modified validators moving forward. Skipped
+    # when the pet itself is being deleted.
+    if not _deleting_pet(origin):
+        _touch_pets([instance.pet_id])
+
+
+# Per-user data versions
+
+
+@receiver(pre_delete, sender=Pet)
+def bump_versions_on_pet_delete(sender, instance, **kwargs):
+    # Access rows are gone by post_delete, so collect the users up front
+    bump_pet_data_versions([instance.pk])
+
+
+@receiver(post_save, sender=WeightRecord)
+@receiver(post_save, sender=Vaccination)
+@receiver(post_save, sender=VetVisit)
+@receiver(post_save, sender=PetShare)
+def bump_versions_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_pet_data_versions([instance.pet_id])
+
+
+@receiver(records_bulk_saved)
+def bump_versions_on_bulk_save(sender, pet_ids, **kwargs):
+    bump_pet_data_versions(pet_ids)
+
+
+@receiver(post_delete, sender=WeightRecord)
+@receiver(post_delete, sender=Vaccination)
+@receiver(post_delete, sender=VetVisit)
+def bump_versions_on_delete(sender, instance, origin=None, **kwargs):
+    if not _deleting_pet(origin):
+        bump_pet_data_versions([instance.pet_id])
+
+
+@receiver(post_delete, sender=PetShare)
+def bump_versions_on_share_delete(sender, instance, origin=None, **kwargs):
+    if _deleting_pet(origin):
+        return
+    # The former recipient has lost access, so it is no longer in PetAccess
+    bump_pet_data_versions([instance.pet_id], [instance.shared_with_id])
+
+
+# PetSummary maintenance
+
+
+@receiver(post_save, sender=Pet)
+def create_pet_summary(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        refresh_pet_summaries([instance.pk])
+
+
+@receiver(post_save, sender=WeightRecord)
+@receiver(post_save, sender=Vaccination)
+@receiver(post_save, sender=VetVisit)
+def refresh_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or (created and add_records_to_summaries([instance])):
+        return
+    refresh_pet_summaries([instance.pet_id])
+
+
+@receiver(records_bulk_saved)
+def refresh_summary_on_bulk_save(sender, pet_ids, created=(), **kwargs):
+    # Upserted rows may have replaced a pet's latest figures
+    refresh_pet_summaries(set(pet_ids) - add_records_to_summaries(created))
+
+
+@receiver(post_delete, sender=WeightRecord)
+@receiver(post_delete, sender=Vaccination)
+@receiver(post_delete, sender=VetVisit)
+def refresh_summary_on_delete(sender, instance, origin=None, **kwargs):
+    # A pet's own deletion cascades to its summary as well
+    if not _deleting_pet(origin):
+        refresh_pet_summaries([instance.pet_id])
+
+
+# Token authentication cache
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    # Covers logout, which deletes the user's token
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, raw=False, **kwargs):
+    # Deactivation and profile changes must not be served from the cache
+    if created or raw:
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        token_cache.delete(key)
@@ -0,0 +1,214 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import (
+    Case, Count, F, Max, Min, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+from .models import Pet, PetSummary, Vaccination, VetVisit, WeightRecord
+from .versions import bump_pet_data_versions
+
+SUMMARY_FIELDS = [
+    'latest_weight',
+    'latest_weight_unit',
+    'latest_weight_date',
+    'weight_record_count',
+    'vaccination_count',
+    'vet_visit_count',
+    'last_vet_visit_date',
+    'next_vaccination_due',
+    'vet_spend_ytd',
+    'vet_spend_year',
+    'refreshed_at',
+]
+
+
+def _aggregate(queryset, aggregate):
+    """Correlated aggregate over the outer pet's rows of `queryset`."""
+    return Subquery(
+        queryset.filter(pet=OuterRef('pk'))
+        .order_by()
+        .values('pet')
+        .annotate(value=aggregate)
+        .values('value')
+    )
+
+
+def refresh_pet_summaries(pet_ids, today=None):
+    """
+    Recompute the PetSummary rows of the given pets.
+
+    All figures come from one query over the pets with correlated
+    subqueries on the per-pet indexes, and are written with one upsert.
+    This is a full recompute rather than a delta: each call reads every
+    record of the pets touched, so its cost grows with their history,
+    not with the size of the write. It is what updates, deletes and
+    upserts use, as a changed or removed record may have been the latest
+    one; inserts go through add_records_to_summaries() instead. The
+    summary rows are locked first, so concurrent refreshes of a pet
+    apply one after the other, each from the other's committed records.
+    """
+    pet_ids = set(pet_ids)
+    if not pet_ids:
+        return
+    today = today or timezone.localdate()
+    with transaction.atomic():
+        _lock_summaries(pet_ids)
+        _refresh(pet_ids, today)
+
+
+def _lock_summaries(pet_ids):
+    # In pet order, so that refreshes of overlapping pets cannot deadlock
+    list(
+        PetSummary.objects.filter(pet_id__in=pet_ids)
+        .order_by('pet_id')
+        .select_for_update()
+        .values_list('pk', flat=True)
+    )
+
+
+def _refresh(pet_ids, today):
+    latest_weight = WeightRecord.objects.filter(pet=OuterRef('pk')).order_by('-date', '-id')
+    rows = Pet.objects.filter(pk__in=pet_ids).values_list('pk').annotate(
+        latest_weight=Subquery(latest_weight.values('weight')[:1]),
+        latest_weight_unit=Coalesce(Subquery(latest_weight.values('unit')[:1]), Value('')),
+        latest_weight_date=Subquery(latest_weight.values('date')[:1]),
+        weight_record_count=Coalesce(_aggregate(WeightRecord.objects, Count('pk')), 0),
+        vaccination_count=Coalesce(_aggregate(Vaccination.objects, Count('pk')), 0),
+        vet_visit_count=Coalesce(_aggregate(VetVisit.objects, Count('pk')), 0),
+        last_vet_visit_date=_aggregate(VetVisit.objects, Max('date')),
+        next_vaccination_due=_aggregate(
+            Vaccination.objects.filter(due_date__gte=today), Min('due_date')
+        ),
+        vet_spend_ytd=Coalesce(
+            _aggregate(VetVisit.objects.filter(date__year=today.year), Sum('cost')),
+            Value(Decimal('0.00')),
+        ),
+    )
+    names = ['pet_id', *SUMMARY_FIELDS[:-2]]
+    now = timezone.now()
+    PetSummary.objects.bulk_create(
+        [
+            PetSummary(**dict(zip(names, row)), vet_spend_year=today.year, refreshed_at=now)
+            for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=['pet'],
+        update_fields=SUMMARY_FIELDS,
+    )
+
+
+def _record_deltas(model, records, today):
+    """
+    The (filter, changes) folding one pet's newly inserted `records` of
+    `model` into its summary, or None for a model without a summary.
+    """
+    condition = Q()
+    changes = {}
+    if model is WeightRecord:
+        # New records have the highest ids, so they are the latest on a tie
+        latest = max(records, key=lambda record: (record.date, record.pk))
+        newer = Q(latest_weight_date__isnull=True) | Q(latest_weight_date__lte=latest.date)
+        changes.update(
+            weight_record_count=F('weight_record_count') + len(records),
+            latest_weight=Case(When(newer, then=Value(latest.weight)), default=F('latest_weight')),
+            latest_weight_unit=Case(
+                When(newer, then=Value(latest.unit)), default=F('latest_weight_unit')
+            ),
+            latest_weight_date=Case(
+                When(newer, then=Value(latest.date)), default=F('latest_weight_date')
+            ),
+        )
+    elif model is Vaccination:
+        condition = Q(next_vaccination_due__isnull=True) | Q(next_vaccination_due__gte=today)
+        changes['vaccination_count'] = F('vaccination_count') + len(records)
+        due_dates = [
+            record.due_date for record in records
+            if record.due_date is not None and record.due_date >= today
+        ]
+        if due_dates:
+            # LEAST() skips NULLs on PostgreSQL
+            changes['next_vaccination_due'] = Least(
+                F('next_vaccination_due'), Value(min(due_dates))
+            )
+    elif model is VetVisit:
+        changes.update(
+            vet_visit_count=F('vet_visit_count') + len(records),
+            last_vet_visit_date=Greatest(
+                F('last_vet_visit_date'), Value(max(record.date for record in records))
+            ),
+        )
+        spend = sum(
+            (record.cost for record in records
+             if record.cost is not None and record.date.year == today.year),
+            Decimal('0.00'),
+        )
+        if spend:
+            changes['vet_spend_ytd'] = F('vet_spend_ytd') + spend
+    else:
+        return None
+    return condition, changes
+
+
+def add_records_to_summaries(records, today=None):
+    """
+    Fold newly inserted records into their pets' summaries as deltas, with
+    one UPDATE per pet that does not read the pets' other records.
+
+    Returns the ids of the pets updated. A pet whose summary cannot take
+    the delta is left out without a write: its summary is missing, its
+    year-to-date spend is for another year, or, for vaccinations, its next
+    due date has already passed. Callers refresh those pets instead.
+    """
+    today = today or timezone.localdate()
+    by_pet = defaultdict(list)
+    for record in records:
+        by_pet[(type(record), record.pet_id)].append(record)
+    now = timezone.now()
+    updated = set()
+    for (model, pet_id), pet_records in by_pet.items():
+        deltas = _record_deltas(model, pet_records, today)
+        if deltas is None:
+            continue
+        condition, changes = deltas
+        rows = PetSummary.objects.filter(
+            condition, pet_id=pet_id, vet_spend_year=today.year
+        ).update(refreshed_at=now, **changes)
+        if rows:
+            updated.add(pet_id)
+    return updated
+
+
+def rebuild_pet_summaries(chunk_size=1000, stale_only=False, today=None):
+    """
+    Refresh the summaries of all pets in primary key chunks, one
+    transaction per chunk. With `stale_only`, only pets without a summary
+    or whose date-dependent figures have rolled over. Returns the number of
+    pets refreshed.
+
+    The summaries' representation depends on the date as well, so the data
+    versions of the refreshed pets are bumped for the listing ETags and
+    cached responses to move on with the date.
+    """
+    today = today or timezone.localdate()
+    pets = Pet.objects.order_by('pk')
+    if stale_only:
+        pets = pets.filter(
+            Q(summary__isnull=True)
+            | Q(summary__next_vaccination_due__lt=today)
+            | ~Q(summary__vet_spend_year=today.year)
+        )
+    pet_ids = pets.values_list('pk', flat=True)
+    total = 0
+    last_id = 0
+    while True:
+        chunk = list(pet_ids.filter(pk__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        with transaction.atomic():
+            refresh_pet_summaries(chunk, today=today)
+            bump_pet_data_versions(chunk)
+        total += len(chunk)
+        last_id = chunk[-1]
+    return total
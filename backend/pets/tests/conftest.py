@@ -0,0 +1,15 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_default_cache():
+    """Start every test without throttle history or data versions"""
+    cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def shared_data_versions(settings):
+    """The test process is the only one, so its LocMem versions are shared"""
+    settings.DATA_VERSIONS_SHARED = True
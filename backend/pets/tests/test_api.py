@@ -1,12 +1,30 @@
+import csv
+import io
+import json
 import pytest
+import runpy
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from asgiref.sync import async_to_sync
 from rest_framework.test import APIClient
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
 from django.urls import reverse
-from datetime import date
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from datetime import date, timedelta
 from decimal import Decimal
-from pets.models import Pet, WeightRecord, Vaccination, VetVisit, PetShare
+from pets.models import (
+    Pet, WeightRecord, Vaccination, VetVisit, PetShare, HistoryImport, PetSummary,
+)
+from pets.access import get_pet_roles, get_pet_role
+from pets.authentication import TokenCache, token_cache
+from pets.caching import response_cache
+from pets.db import connection_stats
 
 pytestmark = [pytest.mark.django_db]
 
@@ -147,6 +165,41 @@ class TestPetDetailAPI:
         assert len(response.data["vaccinations"]) == 1
         assert len(response.data["vet_visits"]) == 1
 
+    def test_get_pet_detail_embeds_only_recent_records(
+        self, authenticated_client, settings
+    ):
+        # Arrange
+        settings.PET_DETAIL_RECORD_LIMIT = 2
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        for days_ago in range(5):
+            WeightRecord.objects.create(
+                pet=pet,
+                date=date.today() - timedelta(days=days_ago),
+                weight=Decimal("25.5"),
+            )
+
+        # Act
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        response = authenticated_client.get(url)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        dates = [record["date"] for record in response.data["weight_records"]]
+        assert dates == [
+            date.today().isoformat(),
+            (date.today() - timedelta(days=1)).isoformat(),
+        ]
+        assert response.data["record_counts"] == {
+            "weight_records": 5,
+            "vaccinations": 0,
+            "vet_visits": 0,
+        }
+        assert response.data["record_links"]["weight_records"].endswith(
+            f"/api/weight-records/?pet={pet.id}"
+        )
+
 
 class TestPetCreateAPI:
     """Test POST /api/pets/ endpoint"""
@@ -560,7 +613,7 @@ class TestMultiTenancyWeightRecords:
 
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        assert response.data["count"] == 1
+        assert len(response.data["results"]) == 1
         assert response.data["results"][0]["pet"] == my_pet.id
 
     def test_user_cannot_access_weight_record_for_other_users_pet(
@@ -610,7 +663,7 @@ class TestMultiTenancyVaccinations:
 
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        assert response.data["count"] == 1
+        assert len(response.data["results"]) == 1
         assert response.data["results"][0]["pet"] == my_pet.id
 
     def test_user_cannot_access_vaccination_for_other_users_pet(
@@ -656,7 +709,7 @@ class TestMultiTenancyVetVisits:
 
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        assert response.data["count"] == 1
+        assert len(response.data["results"]) == 1
         assert response.data["results"][0]["pet"] == my_pet.id
 
     def test_user_cannot_access_vet_visit_for_other_users_pet(
@@ -978,7 +1031,7 @@ class TestViewerPermissions:
 
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        assert response.data["count"] == 1
+        assert len(response.data["results"]) == 1
 
     def test_viewer_cannot_create_weight_record(
         self, authenticated_client, second_client
@@ -1121,3 +1174,2580 @@ class TestEditorPermissions:
 
         # Assert
         assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestPetRoleResolution:
+    """Test per-request role resolution used by permissions and serializers"""
+
+    def test_roles_loaded_once_per_request(
+        self, authenticated_client, second_user, django_assert_num_queries
+    ):
+        # Arrange
+        owned = Pet.objects.create(name="Mine", species="dog", owner=second_user)
+        edited = Pet.objects.create(
+            name="Edited", species="cat", owner=authenticated_client.user
+        )
+        viewed = Pet.objects.create(
+            name="Viewed", species="cat", owner=authenticated_client.user
+        )
+        PetShare.objects.create(pet=edited, shared_with=second_user, role="editor")
+        PetShare.objects.create(pet=viewed, shared_with=second_user, role="viewer")
+        request = SimpleNamespace(user=second_user)
+
+        # Act / Assert
+        with django_assert_num_queries(1):
+            roles = get_pet_roles(request)
+            get_pet_roles(request)
+            assert get_pet_role(request, edited.id) == "editor"
+
+        assert roles == {owned.id: "owner", edited.id: "editor", viewed.id: "viewer"}
+
+    def test_unrelated_pet_has_no_role(self, authenticated_client, second_user):
+        # Arrange
+        pet = Pet.objects.create(name="Other", species="dog", owner=second_user)
+        request = SimpleNamespace(user=authenticated_client.user)
+
+        # Act / Assert
+        assert get_pet_role(request, pet) is None
+
+
+class TestPetListQueryCount:
+    """Test that GET /api/pets/ runs a constant number of queries"""
+
+    def count_list_queries(self, client):
+        token_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse("pet-list"))
+        assert response.status_code == status.HTTP_200_OK
+        return len(queries), response
+
+    def test_query_count_independent_of_page_size(
+        self, authenticated_client, second_user
+    ):
+        # Arrange
+        def add_pets(count):
+            for i in range(count):
+                own = Pet.objects.create(
+                    name=f"Own{i}", species="dog", owner=authenticated_client.user
+                )
+                PetShare.objects.create(pet=own, shared_with=second_user, role="viewer")
+                shared = Pet.objects.create(
+                    name=f"Shared{i}", species="cat", owner=second_user
+                )
+                PetShare.objects.create(
+                    pet=shared, shared_with=authenticated_client.user, role="editor"
+                )
+
+        add_pets(1)
+        small_count, _ = self.count_list_queries(authenticated_client)
+        add_pets(4)
+
+        # Act
+        large_count, response = self.count_list_queries(authenticated_client)
+
+        # Assert
+        assert response.data["count"] == 10
+        assert large_count == small_count
+        roles = {pet["name"]: pet["user_role"] for pet in response.data["results"]}
+        assert roles["Own0"] == "owner"
+        assert roles["Shared0"] == "editor"
+        shared = next(p for p in response.data["results"] if p["name"] == "Shared0")
+        assert shared["is_shared"] is True
+        assert shared["owner_username"] == second_user.username
+
+
+class TestRecordCursorPagination:
+    """Test keyset pagination on the record list endpoints"""
+
+    def test_weight_records_paginate_by_cursor(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        for days_ago in range(5):
+            WeightRecord.objects.create(
+                pet=pet,
+                date=date.today() - timedelta(days=days_ago),
+                weight=Decimal("25.5"),
+            )
+        url = f"{reverse('weightrecord-list')}?pet={pet.id}&page_size=2"
+
+        # Act
+        dates = []
+        while url:
+            response = authenticated_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert "count" not in response.data
+            dates.extend(record["date"] for record in response.data["results"])
+            url = response.data["next"]
+
+        # Assert
+        assert dates == [
+            (date.today() - timedelta(days=days_ago)).isoformat()
+            for days_ago in range(5)
+        ]
+
+    def test_pages_through_more_than_a_thousand_same_day_records(
+        self, authenticated_client
+    ):
+        # Arrange
+        administered = date(2024, 1, 1)
+        for name in ("Buddy", "Rex"):
+            pet = Pet.objects.create(
+                name=name, species="dog", owner=authenticated_client.user
+            )
+            Vaccination.objects.bulk_create(
+                Vaccination(pet=pet, vaccine_name="Rabies", date_administered=administered)
+                for _ in range(650)
+            )
+        url = f"{reverse('vaccination-list')}?page_size=100"
+
+        # Act
+        ids = []
+        while url:
+            response = authenticated_client.get(url)
+            ids.extend(record["id"] for record in response.data["results"])
+            url = response.data["next"]
+
+        # Assert
+        assert len(ids) == 1300
+        assert ids == sorted(Vaccination.objects.values_list("id", flat=True), reverse=True)
+
+    def test_vaccinations_ordered_by_date_then_id(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        first = Vaccination.objects.create(
+            pet=pet, vaccine_name="Rabies", date_administered=date.today()
+        )
+        second = Vaccination.objects.create(
+            pet=pet, vaccine_name="Parvo", date_administered=date.today()
+        )
+        older = Vaccination.objects.create(
+            pet=pet,
+            vaccine_name="Distemper",
+            date_administered=date.today() - timedelta(days=30),
+        )
+
+        # Act
+        response = authenticated_client.get(
+            reverse("vaccination-list"), {"pet": pet.id}
+        )
+
+        # Assert
+        ids = [record["id"] for record in response.data["results"]]
+        assert ids == [second.id, first.id, older.id]
+
+
+class TestRecordBulkCreateAPI:
+    """Test POST /api/<records>/bulk/ endpoints"""
+
+    def weight_batch(self, pet, count, start=None):
+        start = start or date(2024, 1, 1)
+        return [
+            {
+                "pet": pet.id,
+                "date": (start + timedelta(days=i)).isoformat(),
+                "weight": "10.50",
+                "unit": "kg",
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create_weight_records(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        response = authenticated_client.post(
+            reverse("weightrecord-bulk"), self.weight_batch(pet, 3), format="json"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.data) == 3
+        assert all(record["id"] for record in response.data)
+        assert WeightRecord.objects.filter(pet=pet).count() == 3
+
+    def test_bulk_create_query_count_independent_of_batch_size(
+        self, authenticated_client
+    ):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        def post_batch(batch):
+            token_cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = authenticated_client.post(
+                    reverse("vetvisit-bulk"), batch, format="json"
+                )
+            assert response.status_code == status.HTTP_201_CREATED
+            return len(queries)
+
+        visit = {"pet": pet.id, "date": "2024-01-01", "reason": "Checkup"}
+
+        # Act / Assert
+        assert post_batch([visit] * 2) == post_batch([visit] * 20)
+
+    def test_bulk_create_reports_per_item_errors(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        batch = [
+            {"pet": pet.id, "vaccine_name": "Rabies", "date_administered": "2024-01-01"},
+            {"pet": pet.id, "vaccine_name": "Parvo"},
+        ]
+
+        # Act
+        response = authenticated_client.post(
+            reverse("vaccination-bulk"), batch, format="json"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data[0] == {}
+        assert "date_administered" in response.data[1]
+        assert Vaccination.objects.count() == 0
+
+    def test_bulk_create_rejects_duplicate_weight_dates(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00")
+        )
+        batch = self.weight_batch(pet, 2) + self.weight_batch(pet, 1, date(2024, 1, 2))
+
+        # Act
+        response = authenticated_client.post(
+            reverse("weightrecord-bulk"), batch, format="json"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "unique set" in str(response.data[0]["non_field_errors"][0])
+        assert response.data[1] == {}
+        assert "batch" in str(response.data[2]["non_field_errors"][0])
+        assert WeightRecord.objects.filter(pet=pet).count() == 1
+
+    def test_bulk_create_enforces_max_batch_size(self, authenticated_client, settings):
+        # Arrange
+        settings.RECORD_BATCH_MAX_SIZE = 2
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        response = authenticated_client.post(
+            reverse("weightrecord-bulk"), self.weight_batch(pet, 3), format="json"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert WeightRecord.objects.count() == 0
+
+    def test_viewer_cannot_bulk_create(self, authenticated_client, second_client):
+        # Arrange
+        own = Pet.objects.create(name="Mine", species="dog", owner=second_client.user)
+        shared = Pet.objects.create(
+            name="Shared", species="cat", owner=authenticated_client.user
+        )
+        PetShare.objects.create(pet=shared, shared_with=second_client.user, role="viewer")
+        batch = self.weight_batch(own, 1) + self.weight_batch(shared, 1)
+
+        # Act
+        response = second_client.post(
+            reverse("weightrecord-bulk"), batch, format="json"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert WeightRecord.objects.count() == 0
+
+
+class TestWeightRecordUpsertAPI:
+    """Test ?upsert=true on weight record creation"""
+
+    def test_upsert_replaces_existing_reading(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        existing = WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00")
+        )
+        data = {"pet": pet.id, "date": "2024-01-01", "weight": "11.25", "unit": "lb"}
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.post(
+                f"{reverse('weightrecord-list')}?upsert=true", data, format="json"
+            )
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["id"] == existing.id
+        existing.refresh_from_db()
+        assert existing.weight == Decimal("11.25")
+        assert existing.unit == "lb"
+        writes = [
+            q["sql"] for q in queries
+            if q["sql"].startswith('INSERT INTO "pets_weightrecord"')
+        ]
+        assert len(writes) == 1
+        assert "ON CONFLICT" in writes[0]
+
+    def test_upsert_without_flag_still_rejects_duplicate(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00")
+        )
+        data = {"pet": pet.id, "date": "2024-01-01", "weight": "11.25"}
+
+        # Act
+        response = authenticated_client.post(
+            reverse("weightrecord-list"), data, format="json"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_bulk_upsert_inserts_and_updates(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        existing = WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00")
+        )
+        batch = [
+            {"pet": pet.id, "date": "2024-01-01", "weight": "10.50"},
+            {"pet": pet.id, "date": "2024-01-02", "weight": "10.75"},
+        ]
+
+        # Act
+        response = authenticated_client.post(
+            f"{reverse('weightrecord-bulk')}?upsert=true", batch, format="json"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data[0]["id"] == existing.id
+        weights = dict(
+            WeightRecord.objects.filter(pet=pet).values_list("date", "weight")
+        )
+        assert weights == {
+            date(2024, 1, 1): Decimal("10.50"),
+            date(2024, 1, 2): Decimal("10.75"),
+        }
+
+    def test_bulk_upsert_keeps_fields_an_item_did_not_send(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        kept = WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00"), notes="keep me"
+        )
+        batch = [
+            {"pet": pet.id, "date": "2024-01-01", "weight": "10.50"},
+            {"pet": pet.id, "date": "2024-01-02", "weight": "10.75", "notes": "new"},
+        ]
+
+        # Act
+        response = authenticated_client.post(
+            f"{reverse('weightrecord-bulk')}?upsert=true", batch, format="json"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        kept.refresh_from_db()
+        assert kept.weight == Decimal("10.50")
+        assert kept.notes == "keep me"
+        assert [item["notes"] for item in response.data] == ["keep me", "new"]
+
+    def test_upsert_responds_with_stored_row(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        existing = WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00"), notes="stored"
+        )
+        data = {"pet": pet.id, "date": "2024-01-01", "weight": "11.00"}
+
+        # Act
+        response = authenticated_client.post(
+            f"{reverse('weightrecord-list')}?upsert=true", data, format="json"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["notes"] == "stored"
+        assert response.data["weight"] == "11.00"
+        assert response.data["created_at"] == serializers.DateTimeField().to_representation(
+            existing.created_at
+        )
+
+    def test_upsert_not_supported_for_vaccinations(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        data = {"pet": pet.id, "vaccine_name": "Rabies", "date_administered": "2024-01-01"}
+
+        # Act
+        response = authenticated_client.post(
+            f"{reverse('vaccination-list')}?upsert=true", data, format="json"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "upsert" in response.data
+
+
+class TestPetExportAPI:
+    """Test GET /api/pets/{id}/export/"""
+
+    def create_history(self, pet):
+        WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 2), weight=Decimal("10.50"), unit="kg"
+        )
+        WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00"), unit="kg"
+        )
+        Vaccination.objects.create(
+            pet=pet,
+            vaccine_name="Rabies",
+            date_administered=date(2024, 2, 1),
+            due_date=date(2025, 2, 1),
+        )
+        VetVisit.objects.create(
+            pet=pet, date=date(2024, 3, 1), reason="Checkup", cost=Decimal("45.00")
+        )
+
+    def test_export_csv(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        self.create_history(pet)
+
+        # Act
+        url = reverse("pet-export", kwargs={"pk": pet.id})
+        response = authenticated_client.get(url, {"format": "csv"})
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"].startswith("text/csv")
+        body = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        assert [(row["record_type"], row["date"]) for row in rows] == [
+            ("weight", "2024-01-01"),
+            ("weight", "2024-01-02"),
+            ("vaccination", "2024-02-01"),
+            ("vet_visit", "2024-03-01"),
+        ]
+        assert rows[2]["due_date"] == "2025-02-01"
+        assert rows[3]["cost"] == "45.00"
+
+    def test_export_ndjson(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        self.create_history(pet)
+
+        # Act
+        url = reverse("pet-export", kwargs={"pk": pet.id})
+        response = authenticated_client.get(url, {"format": "ndjson"})
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        assert len(records) == 4
+        assert records[0] == {
+            "record_type": "weight",
+            "id": records[0]["id"],
+            "date": "2024-01-01",
+            "weight": "10.00",
+            "unit": "kg",
+            "notes": "",
+        }
+
+    def test_viewer_can_export(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        PetShare.objects.create(pet=pet, shared_with=second_client.user, role="viewer")
+
+        # Act
+        url = reverse("pet-export", kwargs={"pk": pet.id})
+        response = second_client.get(url, {"format": "csv"})
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_cannot_export_other_users_pet(self, authenticated_client, second_user):
+        # Arrange
+        pet = Pet.objects.create(name="Other", species="dog", owner=second_user)
+
+        # Act
+        url = reverse("pet-export", kwargs={"pk": pet.id})
+        response = authenticated_client.get(url, {"format": "ndjson"})
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestPetImportAPI:
+    """Test POST /api/pets/{id}/import/"""
+
+    CSV = (
+        "record_type,date,weight,unit,vaccine_name,due_date,reason,cost,notes\n"
+        "weight,2024-01-01,10.50,kg,,,,,\n"
+        "weight,2024-01-02,not-a-number,kg,,,,,\n"
+        "vaccination,2024-02-01,,,Rabies,2025-02-01,,,\n"
+        "vet_visit,2024-03-01,,,,,Checkup,45.00,\"multi\nline\"\n"
+        "grooming,2024-04-01,,,,,,,\n"
+    )
+
+    def upload(self, client, pet, content, encoding="utf-8", **extra):
+        url = reverse("pet-import-history", kwargs={"pk": pet.id})
+        upload = SimpleUploadedFile("history.csv", content.encode(encoding), "text/csv")
+        return client.post(url, {"file": upload, **extra}, format="multipart")
+
+    def test_import_creates_records_and_reports_errors(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        response = self.upload(authenticated_client, pet, self.CSV)
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["status"] == "completed"
+        assert response.data["rows_processed"] == 5
+        assert response.data["weights_imported"] == 1
+        assert response.data["vaccinations_imported"] == 1
+        assert response.data["vet_visits_imported"] == 1
+        assert response.data["error_count"] == 2
+        assert [error["row"] for error in response.data["errors"]] == [2, 5]
+        assert "weight" in response.data["errors"][0]["errors"]
+        assert VetVisit.objects.get(pet=pet).notes == "multi\nline"
+
+    def test_export_round_trips_through_import(self, authenticated_client):
+        # Arrange
+        source = Pet.objects.create(
+            name="Source", species="dog", owner=authenticated_client.user
+        )
+        target = Pet.objects.create(
+            name="Target", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(pet=source, date=date(2024, 1, 1), weight=Decimal("9.00"))
+        Vaccination.objects.create(
+            pet=source, vaccine_name="Rabies", date_administered=date(2024, 2, 1)
+        )
+        export = authenticated_client.get(
+            reverse("pet-export", kwargs={"pk": source.id}), {"format": "csv"}
+        )
+        content = b"".join(export.streaming_content).decode()
+
+        # Act
+        response = self.upload(authenticated_client, target, content)
+
+        # Assert
+        assert response.data["error_count"] == 0
+        assert WeightRecord.objects.get(pet=target).weight == Decimal("9.00")
+        assert Vaccination.objects.get(pet=target).vaccine_name == "Rabies"
+
+    def test_resume_skips_committed_rows(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        interrupted = HistoryImport.objects.create(
+            pet=pet, status="failed", rows_processed=3, weights_imported=1
+        )
+
+        # Act
+        response = self.upload(
+            authenticated_client, pet, self.CSV, resume=interrupted.id
+        )
+
+        # Assert
+        assert response.data["id"] == interrupted.id
+        assert response.data["status"] == "completed"
+        assert response.data["rows_processed"] == 5
+        assert not WeightRecord.objects.filter(pet=pet).exists()
+        assert not Vaccination.objects.filter(pet=pet).exists()
+        assert VetVisit.objects.filter(pet=pet).count() == 1
+
+    def test_empty_cells_keep_stored_values(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        kept = WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00"), notes="keep me"
+        )
+        content = (
+            "record_type,date,weight,unit,notes\n"
+            "weight,2024-01-01,10.50,kg,\n"
+            "weight,2024-01-02,10.75,kg,new\n"
+        )
+
+        # Act
+        response = self.upload(authenticated_client, pet, content)
+
+        # Assert
+        assert response.data["weights_imported"] == 2
+        kept.refresh_from_db()
+        assert kept.weight == Decimal("10.50")
+        assert kept.notes == "keep me"
+
+    def test_non_utf8_file_fails_with_row(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        content = (
+            "record_type,date,weight,unit,notes\n"
+            "weight,2024-01-01,10.50,kg,\n"
+            "weight,2024-01-02,10.75,kg,Caf\u00e9\n"
+        )
+
+        # Act
+        response = self.upload(authenticated_client, pet, content, encoding="latin-1")
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["status"] == "failed"
+        assert response.data["errors"][-1]["row"] == 2
+        assert "UTF-8" in response.data["errors"][-1]["errors"]["file"][0]
+        assert HistoryImport.objects.get().status == "failed"
+
+    def test_malformed_csv_fails_with_row(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        oversized = "x" * (csv.field_size_limit() + 1)
+        content = f"record_type,date,weight,unit,notes\nweight,2024-01-01,10.50,kg,{oversized}\n"
+
+        # Act
+        response = self.upload(authenticated_client, pet, content)
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["errors"][-1]["row"] == 1
+        assert "not valid CSV" in response.data["errors"][-1]["errors"]["file"][0]
+
+    def test_editor_can_import(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        PetShare.objects.create(pet=pet, shared_with=second_client.user, role="editor")
+
+        # Act
+        response = self.upload(second_client, pet, self.CSV)
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["weights_imported"] == 1
+
+    def test_cannot_import_into_invisible_pet(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        response = self.upload(second_client, pet, self.CSV)
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not HistoryImport.objects.exists()
+
+    def test_viewer_cannot_import(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        PetShare.objects.create(pet=pet, shared_with=second_client.user, role="viewer")
+
+        # Act
+        response = self.upload(second_client, pet, self.CSV)
+
+        # Assert
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not HistoryImport.objects.exists()
+
+
+class TestConditionalGetAPI:
+    """Test ETag / Last-Modified handling on pet detail and record lists"""
+
+    def test_detail_returns_validators(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        response = authenticated_client.get(reverse("pet-detail", kwargs={"pk": pet.id}))
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"].startswith('"')
+        assert "Last-Modified" in response
+
+    def test_detail_if_none_match_returns_304(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00"))
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        etag = authenticated_client.get(url)["ETag"]
+        caches["responses"].clear()
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        # Only the validator query; the token is already cached
+        assert len(queries) == 1
+
+    def test_detail_etag_changes_when_record_added(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        etag = authenticated_client.get(url)["ETag"]
+        Vaccination.objects.create(
+            pet=pet, vaccine_name="Rabies", date_administered=date(2024, 1, 1)
+        )
+
+        # Act
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+        assert len(response.data["vaccinations"]) == 1
+
+    def test_detail_etag_depends_on_query_string(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        etag = authenticated_client.get(url)["ETag"]
+
+        # Act
+        response = authenticated_client.get(
+            url, {"weight_unit": "lb"}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_detail_etag_changes_when_share_role_changes(self, authenticated_client, second_user):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        share = PetShare.objects.create(pet=pet, shared_with=second_user, role="viewer")
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        etag = authenticated_client.get(url)["ETag"]
+
+        # Act
+        share.role = "editor"
+        share.save()
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["shared_with"][0]["role"] == "editor"
+
+    def test_detail_etag_changes_when_record_deleted(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        VetVisit.objects.create(pet=pet, date=date(2024, 1, 1), reason="Checkup")
+        VetVisit.objects.create(pet=pet, date=date(2024, 2, 1), reason="Follow-up")
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        etag = authenticated_client.get(url)["ETag"]
+        VetVisit.objects.filter(reason="Follow-up").get().delete()
+
+        # Act
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["vet_visits"]) == 1
+
+    def test_detail_etag_is_per_user(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        PetShare.objects.create(pet=pet, shared_with=second_client.user, role="viewer")
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        etag = authenticated_client.get(url)["ETag"]
+
+        # Act
+        response = second_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["user_role"] == "viewer"
+
+    def test_detail_of_invisible_pet_is_404(self, authenticated_client, second_user):
+        # Arrange
+        pet = Pet.objects.create(name="Other", species="cat", owner=second_user)
+
+        # Act
+        response = authenticated_client.get(
+            reverse("pet-detail", kwargs={"pk": pet.id}), HTTP_IF_NONE_MATCH="*"
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_record_list_if_none_match_returns_304(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00"))
+        url = reverse("weightrecord-list")
+        etag = authenticated_client.get(url, {"pet": pet.id})["ETag"]
+
+        # Act
+        response = authenticated_client.get(url, {"pet": pet.id}, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_record_list_etag_changes_on_update(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        record = WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00")
+        )
+        url = reverse("weightrecord-list")
+        etag = authenticated_client.get(url)["ETag"]
+        record.weight = Decimal("11.00")
+        record.save()
+
+        # Act
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["weight"] == "11.00"
+
+    def test_record_list_if_modified_since(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        VetVisit.objects.create(pet=pet, date=date(2024, 1, 1), reason="Checkup")
+        url = reverse("vetvisit-list")
+        last_modified = authenticated_client.get(url)["Last-Modified"]
+
+        # Act
+        response = authenticated_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # Assert
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+    def test_record_save_advances_pet_updated_at(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        before = Pet.objects.get(pk=pet.pk).updated_at
+
+        # Act
+        VetVisit.objects.create(pet=pet, date=date(2024, 1, 1), reason="Checkup")
+
+        # Assert
+        assert Pet.objects.get(pk=pet.pk).updated_at > before
+
+    def test_record_list_last_modified_skips_records(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        VetVisit.objects.create(pet=pet, date=date(2024, 1, 1), reason="Checkup")
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(reverse("vetvisit-list"))
+
+        # Assert
+        assert "Last-Modified" in response
+        aggregates = [query["sql"] for query in queries if "MAX(" in query["sql"]]
+        assert len(aggregates) == 1
+        assert "pets_vetvisit" not in aggregates[0]
+
+
+class TestDataVersionAPI:
+    """Test the per-user data version and version-validated listings"""
+
+    def version(self, client):
+        return int(client.get(reverse("pet-list"))["X-Data-Version"])
+
+    def test_version_header_on_responses(self, authenticated_client):
+        # Act
+        response = authenticated_client.get(reverse("pet-list"))
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert int(response["X-Data-Version"]) > 0
+
+    def test_version_advances_on_record_changes(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        before = self.version(authenticated_client)
+
+        # Act
+        record = WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00")
+        )
+        after_create = self.version(authenticated_client)
+        record.delete()
+        after_delete = self.version(authenticated_client)
+
+        # Assert
+        assert before < after_create < after_delete
+
+    def test_bulk_create_advances_version(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        before = self.version(authenticated_client)
+
+        # Act
+        response = authenticated_client.post(
+            reverse("weightrecord-bulk"),
+            [{"pet": pet.id, "date": "2024-01-01", "weight": "10.00"}],
+            format="json",
+        )
+
+        # Assert
+        assert int(response["X-Data-Version"]) > before
+
+    def test_shared_users_see_owner_changes(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        PetShare.objects.create(pet=pet, shared_with=second_client.user, role="viewer")
+        before = self.version(second_client)
+
+        # Act
+        VetVisit.objects.create(pet=pet, date=date(2024, 1, 1), reason="Checkup")
+
+        # Assert
+        assert self.version(second_client) > before
+
+    def test_unshare_advances_former_recipient(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        share = PetShare.objects.create(
+            pet=pet, shared_with=second_client.user, role="viewer"
+        )
+        before = self.version(second_client)
+
+        # Act
+        share.delete()
+
+        # Assert
+        assert self.version(second_client) > before
+
+    def test_unrelated_changes_keep_version(self, authenticated_client, second_user):
+        # Arrange
+        other_pet = Pet.objects.create(name="Other", species="cat", owner=second_user)
+        before = self.version(authenticated_client)
+
+        # Act
+        WeightRecord.objects.create(
+            pet=other_pet, date=date(2024, 1, 1), weight=Decimal("4.00")
+        )
+
+        # Assert
+        assert self.version(authenticated_client) == before
+
+    def test_version_advances_for_previous_owner(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        before = self.version(authenticated_client)
+
+        # Act
+        pet.owner = second_client.user
+        pet.save()
+
+        # Assert
+        assert self.version(authenticated_client) > before
+
+    def test_no_version_validators_without_shared_cache(self, authenticated_client, settings):
+        # Arrange
+        settings.DATA_VERSIONS_SHARED = False
+        Pet.objects.create(name="Buddy", species="dog", owner=authenticated_client.user)
+        url = reverse("pet-list")
+
+        # Act
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH="*")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert "ETag" not in response
+        assert "X-Data-Version" not in response
+
+    def test_pet_list_304_without_database_query(self, authenticated_client):
+        # Arrange
+        Pet.objects.create(name="Buddy", species="dog", owner=authenticated_client.user)
+        url = reverse("pet-list")
+        etag = authenticated_client.get(url)["ETag"]
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(queries) == 0
+
+    def test_pet_list_etag_changes_with_shared_pet(self, authenticated_client, second_client):
+        # Arrange
+        url = reverse("pet-list")
+        etag = second_client.get(url)["ETag"]
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        PetShare.objects.create(pet=pet, shared_with=second_client.user, role="viewer")
+        response = second_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 1
+
+    def test_record_list_304_without_database_query(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        Vaccination.objects.create(
+            pet=pet, vaccine_name="Rabies", date_administered=date(2024, 1, 1)
+        )
+        url = reverse("vaccination-list")
+        etag = authenticated_client.get(url)["ETag"]
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(queries) == 0
+
+
+class TestPetResponseCache:
+    """Test the read-through cache of pet list and detail responses"""
+
+    def test_nothing_cached_without_shared_cache(self, authenticated_client, settings):
+        # Arrange
+        settings.DATA_VERSIONS_SHARED = False
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        authenticated_client.get(url)
+
+        # Act
+        response = authenticated_client.get(url)
+
+        # Assert
+        assert response["X-Cache"] == "MISS"
+        assert "ETag" in response
+
+    def test_detail_served_from_cache(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        first = authenticated_client.get(url)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            second = authenticated_client.get(url)
+
+        # Assert
+        assert first["X-Cache"] == "MISS"
+        assert second["X-Cache"] == "HIT"
+        assert second.data == first.data
+        assert second["ETag"] == first["ETag"]
+        assert len(queries) == 0
+
+    def test_list_served_from_cache(self, authenticated_client):
+        # Arrange
+        Pet.objects.create(name="Buddy", species="dog", owner=authenticated_client.user)
+        url = reverse("pet-list")
+        first = authenticated_client.get(url)
+
+        # Act
+        second = authenticated_client.get(url)
+
+        # Assert
+        assert second["X-Cache"] == "HIT"
+        assert second.data == first.data
+
+    def test_record_change_invalidates_detail(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        authenticated_client.get(url)
+
+        # Act
+        WeightRecord.objects.create(pet=pet, date=date(2024, 1, 1), weight=Decimal("10.00"))
+        response = authenticated_client.get(url)
+
+        # Assert
+        assert response["X-Cache"] == "MISS"
+        assert len(response.data["weight_records"]) == 1
+
+    def test_owner_change_invalidates_shared_user(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        PetShare.objects.create(pet=pet, shared_with=second_client.user, role="viewer")
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        second_client.get(url)
+
+        # Act
+        authenticated_client.patch(url, {"name": "Max"}, format="json")
+        response = second_client.get(url)
+
+        # Assert
+        assert response["X-Cache"] == "MISS"
+        assert response.data["name"] == "Max"
+
+    def test_revoked_share_evicts_former_viewer(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        share = PetShare.objects.create(
+            pet=pet, shared_with=second_client.user, role="viewer"
+        )
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        assert second_client.get(url).status_code == status.HTTP_200_OK
+        assert second_client.get(reverse("pet-list")).data["count"] == 1
+
+        # Act
+        authenticated_client.delete(
+            reverse("pet-unshare", kwargs={"pk": pet.id, "share_id": share.id})
+        )
+
+        # Assert
+        assert second_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+        assert second_client.get(reverse("pet-list")).data["count"] == 0
+
+    def test_entries_are_per_user(self, authenticated_client, second_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        PetShare.objects.create(pet=pet, shared_with=second_client.user, role="editor")
+        url = reverse("pet-detail", kwargs={"pk": pet.id})
+        authenticated_client.get(url)
+
+        # Act
+        response = second_client.get(url)
+
+        # Assert
+        assert response["X-Cache"] == "MISS"
+        assert response.data["user_role"] == "editor"
+
+    def test_hit_and_miss_counters(self, authenticated_client):
+        # Arrange
+        response_cache.reset_stats()
+        url = reverse("pet-list")
+
+        # Act
+        authenticated_client.get(url)
+        authenticated_client.get(url)
+        authenticated_client.get(url)
+
+        # Assert
+        assert response_cache.stats() == {"hits": 2, "misses": 1}
+
+
+class TestWeightStatsAPI:
+    """Test GET /api/pets/{id}/weight-stats/"""
+
+    def create_pet(self, owner):
+        pet = Pet.objects.create(name="Buddy", species="dog", owner=owner)
+        start = date(2024, 1, 1)
+        # 10 kg rising by 0.1 kg a day, every fifth reading logged in pounds
+        WeightRecord.objects.bulk_create(
+            WeightRecord(
+                pet=pet,
+                date=start + timedelta(days=day),
+                weight=(
+                    Decimal(str(round((10 + day / 10) * 2.20462262185, 2)))
+                    if day % 5 == 0
+                    else Decimal("10.00") + Decimal(day) / 10
+                ),
+                unit="lb" if day % 5 == 0 else "kg",
+            )
+            for day in range(400)
+        )
+        return pet
+
+    def get_stats(self, client, pet, **params):
+        return client.get(reverse("pet-weight-stats", kwargs={"pk": pet.id}), params)
+
+    def test_stats_in_kilograms(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user)
+
+        # Act
+        response = self.get_stats(authenticated_client, pet)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data
+        assert data["unit"] == "kg"
+        assert data["count"] == 400
+        assert data["min"] == pytest.approx(10.0, abs=0.01)
+        assert data["max"] == pytest.approx(49.9, abs=0.01)
+        assert data["trend_per_day"] == pytest.approx(0.1, abs=0.001)
+        assert data["latest"] == {"date": date(2025, 2, 3), "weight": 49.9}
+        assert len(data["series"]) == 400
+        # Pound readings are converted
+        assert data["series"][5]["weight"] == pytest.approx(10.5, abs=0.01)
+
+    def test_rolling_averages(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user)
+
+        # Act
+        series = self.get_stats(authenticated_client, pet).data["series"]
+
+        # Assert
+        assert series[0]["rolling_7"] == pytest.approx(10.0, abs=0.01)
+        # Average of days 4..10 is day 7
+        assert series[10]["rolling_7"] == pytest.approx(10.7, abs=0.01)
+        assert series[40]["rolling_30"] == pytest.approx(12.55, abs=0.01)
+
+    def test_percent_change(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user)
+
+        # Act
+        change = self.get_stats(authenticated_client, pet).data["percent_change"]
+
+        # Assert
+        assert change["30d"] == pytest.approx((49.9 - 46.9) / 46.9 * 100, abs=0.05)
+        assert change["90d"] == pytest.approx((49.9 - 40.9) / 40.9 * 100, abs=0.05)
+        assert change["365d"] == pytest.approx((49.9 - 13.4) / 13.4 * 100, abs=0.05)
+
+    def test_stats_in_pounds(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user)
+
+        # Act
+        data = self.get_stats(authenticated_client, pet, unit="lb").data
+
+        # Assert
+        assert data["unit"] == "lb"
+        assert data["min"] == pytest.approx(22.05, abs=0.01)
+        assert data["trend_per_day"] == pytest.approx(0.2205, abs=0.001)
+
+    def test_empty_history(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        data = self.get_stats(authenticated_client, pet).data
+
+        # Assert
+        assert data["count"] == 0
+        assert data["series"] == []
+        assert data["latest"] is None
+        assert data["trend_per_day"] is None
+        assert data["percent_change"] == {"30d": None, "90d": None, "365d": None}
+
+    def test_query_count_is_constant(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            self.get_stats(authenticated_client, pet)
+
+        # Assert
+        # Token, pet, series and summary
+        assert len(queries) == 4
+
+    def test_invalid_unit(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        response = self.get_stats(authenticated_client, pet, unit="stone")
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "unit" in response.data
+
+    def test_other_users_pet_is_404(self, authenticated_client, second_user):
+        # Arrange
+        pet = Pet.objects.create(name="Other", species="cat", owner=second_user)
+
+        # Act
+        response = self.get_stats(authenticated_client, pet)
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestWeightRecordUnits:
+    """Test weight_grams and ?weight_unit= on weight record responses"""
+
+    def test_converted_weight(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("22.00"), unit="lb"
+        )
+
+        # Act
+        response = authenticated_client.get(
+            reverse("weightrecord-list"), {"weight_unit": "kg"}
+        )
+
+        # Assert
+        record = response.data["results"][0]
+        assert record["weight_grams"] == 9979
+        assert record["converted_weight"] == {"value": 9.98, "unit": "kg"}
+
+    def test_converted_weight_in_pet_detail(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("2.50"), unit="kg"
+        )
+
+        # Act
+        response = authenticated_client.get(
+            reverse("pet-detail", kwargs={"pk": pet.id}), {"weight_unit": "g"}
+        )
+
+        # Assert
+        assert response.data["weight_records"][0]["converted_weight"] == {
+            "value": 2500.0,
+            "unit": "g",
+        }
+
+    def test_without_weight_unit(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(pet=pet, date=date(2024, 1, 1), weight=Decimal("2.50"))
+
+        # Act
+        response = authenticated_client.get(reverse("weightrecord-list"))
+
+        # Assert
+        assert "converted_weight" not in response.data["results"][0]
+
+    def test_invalid_weight_unit(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(pet=pet, date=date(2024, 1, 1), weight=Decimal("2.50"))
+
+        # Act
+        response = authenticated_client.get(
+            reverse("weightrecord-list"), {"weight_unit": "stone"}
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "weight_unit" in response.data
+
+
+class TestWeightSeriesAPI:
+    """Test GET /api/pets/{id}/weight-series/"""
+
+    def create_pet(self, owner, readings):
+        pet = Pet.objects.create(name="Buddy", species="dog", owner=owner)
+        start = date(2020, 1, 1)
+        WeightRecord.objects.bulk_create(
+            WeightRecord(
+                pet=pet,
+                date=start + timedelta(days=day),
+                # Flat at 10 kg with a single 20 kg spike on day 500
+                weight=Decimal("20.00") if day == 500 else Decimal("10.00"),
+            )
+            for day in range(readings)
+        )
+        return pet
+
+    def get_series(self, client, pet, **params):
+        return client.get(reverse("pet-weight-series", kwargs={"pk": pet.id}), params)
+
+    def test_downsamples_to_requested_points(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user, 2000)
+
+        # Act
+        response = self.get_series(authenticated_client, pet, points=100)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["total"] == 2000
+        points = response.data["points"]
+        assert len(points) == 100
+        # Endpoints are kept and the spike survives downsampling
+        assert points[0]["date"] == date(2020, 1, 1)
+        assert points[-1]["date"] == date(2020, 1, 1) + timedelta(days=1999)
+        assert {"date": date(2020, 1, 1) + timedelta(days=500), "weight": 20.0} in points
+
+    def test_short_series_returned_whole(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user, 10)
+
+        # Act
+        response = self.get_series(authenticated_client, pet, points=100, unit="lb")
+
+        # Assert
+        assert len(response.data["points"]) == 10
+        assert response.data["points"][0]["weight"] == 22.05
+
+    def test_default_points(self, authenticated_client, settings):
+        # Arrange
+        settings.WEIGHT_SERIES_DEFAULT_POINTS = 50
+        pet = self.create_pet(authenticated_client.user, 200)
+
+        # Act
+        response = self.get_series(authenticated_client, pet)
+
+        # Assert
+        assert len(response.data["points"]) == 50
+
+    def test_empty_series(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user, 0)
+
+        # Act
+        response = self.get_series(authenticated_client, pet, points=10)
+
+        # Assert
+        assert response.data == {"unit": "kg", "total": 0, "points": []}
+
+    @pytest.mark.parametrize("points", ["2", "abc", "100000"])
+    def test_invalid_points(self, authenticated_client, points):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user, 0)
+
+        # Act
+        response = self.get_series(authenticated_client, pet, points=points)
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "points" in response.data
+
+    def test_cached_until_records_change(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user, 50)
+        self.get_series(authenticated_client, pet, points=10)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            self.get_series(authenticated_client, pet, points=10)
+        cached_queries = len(queries)
+        WeightRecord.objects.create(
+            pet=pet, date=date(2021, 1, 1), weight=Decimal("12.00")
+        )
+        response = self.get_series(authenticated_client, pet, points=10)
+
+        # Assert
+        # Pet lookup only
+        assert cached_queries == 1
+        assert response.data["total"] == 51
+        assert response.data["points"][-1]["date"] == date(2021, 1, 1)
+
+
+class TestPetSummary:
+    """Test the incrementally maintained PetSummary on the pet list"""
+
+    def list_summary(self, client, pet):
+        response = client.get(reverse("pet-list"))
+        return next(item for item in response.data["results"] if item["id"] == pet.id)["summary"]
+
+    def test_new_pet_has_empty_summary(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        summary = self.list_summary(authenticated_client, pet)
+
+        # Assert
+        assert summary["weight_record_count"] == 0
+        assert summary["latest_weight"] is None
+        assert summary["vet_spend_ytd"] == "0.00"
+
+    def test_summary_follows_record_writes(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        today = date.today()
+        WeightRecord.objects.create(pet=pet, date=today - timedelta(days=10), weight=Decimal("9.00"))
+        latest = WeightRecord.objects.create(
+            pet=pet, date=today, weight=Decimal("20.00"), unit="lb"
+        )
+        Vaccination.objects.create(
+            pet=pet,
+            vaccine_name="Rabies",
+            date_administered=today,
+            due_date=today + timedelta(days=30),
+        )
+        visit = VetVisit.objects.create(
+            pet=pet, date=today, reason="Checkup", cost=Decimal("45.50")
+        )
+
+        # Act
+        latest.delete()
+        visit.cost = Decimal("50.00")
+        visit.save()
+        summary = self.list_summary(authenticated_client, pet)
+
+        # Assert
+        assert summary["latest_weight"] == "9.00"
+        assert summary["latest_weight_unit"] == "kg"
+        assert summary["weight_record_count"] == 1
+        assert summary["vaccination_count"] == 1
+        assert summary["vet_visit_count"] == 1
+        assert summary["last_vet_visit_date"] == today.isoformat()
+        assert summary["next_vaccination_due"] == (today + timedelta(days=30)).isoformat()
+        assert summary["vet_spend_ytd"] == "50.00"
+
+    def test_insert_applied_as_delta(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        today = date.today()
+        WeightRecord.objects.create(pet=pet, date=today, weight=Decimal("20.00"))
+        VetVisit.objects.create(
+            pet=pet, date=today, reason="Checkup", cost=Decimal("45.50")
+        )
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_client.post(
+                reverse("weightrecord-list"),
+                {"pet": pet.id, "date": (today - timedelta(days=3)).isoformat(), "weight": "9.00"},
+                format="json",
+            )
+            authenticated_client.post(
+                reverse("vetvisit-list"),
+                {
+                    "pet": pet.id,
+                    "date": (today - timedelta(days=1)).isoformat(),
+                    "reason": "Follow-up",
+                    "cost": "10.00",
+                },
+                format="json",
+            )
+
+        # Assert
+        assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        summary = self.list_summary(authenticated_client, pet)
+        assert summary["weight_record_count"] == 2
+        assert summary["latest_weight"] == "20.00"
+        assert summary["vet_visit_count"] == 2
+        assert summary["last_vet_visit_date"] == today.isoformat()
+        assert summary["vet_spend_ytd"] == "55.50"
+
+    def test_insert_recomputes_rolled_over_summary(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        today = date.today()
+        VetVisit.objects.create(
+            pet=pet, date=today, reason="Checkup", cost=Decimal("45.50")
+        )
+        PetSummary.objects.filter(pet=pet).update(
+            vet_spend_ytd=Decimal("99.00"), vet_spend_year=2000
+        )
+
+        # Act
+        VetVisit.objects.create(
+            pet=pet, date=today, reason="Follow-up", cost=Decimal("10.00")
+        )
+        summary = PetSummary.objects.get(pet=pet)
+
+        # Assert
+        assert summary.vet_spend_year == today.year
+        assert summary.vet_spend_ytd == Decimal("55.50")
+
+    def test_failed_refresh_rolls_back_record_write(self, authenticated_client, monkeypatch):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        record = WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("9.00")
+        )
+
+        def fail(pet_ids):
+            raise RuntimeError("summary refresh failed")
+
+        monkeypatch.setattr("pets.signals.refresh_pet_summaries", fail)
+
+        # Act
+        with pytest.raises(RuntimeError):
+            authenticated_client.patch(
+                reverse("weightrecord-detail", args=[record.id]),
+                {"weight": "12.00"},
+                format="json",
+            )
+
+        # Assert
+        record.refresh_from_db()
+        assert record.weight == Decimal("9.00")
+
+    def test_moving_record_refreshes_previous_pet(self, authenticated_client):
+        # Arrange
+        user = authenticated_client.user
+        pet = Pet.objects.create(name="Buddy", species="dog", owner=user)
+        other = Pet.objects.create(name="Max", species="dog", owner=user)
+        record = WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("9.00")
+        )
+
+        # Act
+        authenticated_client.patch(
+            reverse("weightrecord-detail", args=[record.id]),
+            {"pet": other.id},
+            format="json",
+        )
+
+        # Assert
+        assert self.list_summary(authenticated_client, pet)["weight_record_count"] == 0
+        assert self.list_summary(authenticated_client, other)["weight_record_count"] == 1
+
+    def test_cannot_move_record_to_foreign_pet(self, authenticated_client, second_user):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        foreign = Pet.objects.create(name="Max", species="dog", owner=second_user)
+        record = WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("9.00")
+        )
+
+        # Act
+        response = authenticated_client.patch(
+            reverse("weightrecord-detail", args=[record.id]),
+            {"pet": foreign.id},
+            format="json",
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        record.refresh_from_db()
+        assert record.pet_id == pet.id
+
+    def test_summary_follows_bulk_create(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        authenticated_client.post(
+            reverse("weightrecord-bulk"),
+            [
+                {"pet": pet.id, "date": "2024-01-01", "weight": "10.00"},
+                {"pet": pet.id, "date": "2024-02-01", "weight": "11.00"},
+            ],
+            format="json",
+        )
+        summary = self.list_summary(authenticated_client, pet)
+
+        # Assert
+        assert summary["weight_record_count"] == 2
+        assert summary["latest_weight"] == "11.00"
+        assert summary["latest_weight_date"] == "2024-02-01"
+
+    def test_bulk_insert_applied_as_delta(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        today = date.today()
+        VetVisit.objects.create(
+            pet=pet, date=today, reason="Checkup", cost=Decimal("45.50")
+        )
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_client.post(
+                reverse("vetvisit-bulk"),
+                [
+                    {"pet": pet.id, "date": today.isoformat(), "reason": "Shots", "cost": "10.00"},
+                    {"pet": pet.id, "date": (today - timedelta(days=400)).isoformat(),
+                     "reason": "Old", "cost": "99.00"},
+                ],
+                format="json",
+            )
+
+        # Assert
+        assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        summary = self.list_summary(authenticated_client, pet)
+        assert summary["vet_visit_count"] == 3
+        assert summary["last_vet_visit_date"] == today.isoformat()
+        assert summary["vet_spend_ytd"] == "55.50"
+
+    def test_upsert_recomputes_locked_summary(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(pet=pet, date=date(2024, 2, 1), weight=Decimal("20.00"))
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_client.post(
+                reverse("weightrecord-bulk") + "?upsert=true",
+                [{"pet": pet.id, "date": "2024-02-01", "weight": "11.00"}],
+                format="json",
+            )
+
+        # Assert
+        assert any(
+            "FOR UPDATE" in query["sql"] and "pets_petsummary" in query["sql"]
+            for query in queries.captured_queries
+        )
+        summary = self.list_summary(authenticated_client, pet)
+        assert summary["weight_record_count"] == 1
+        assert summary["latest_weight"] == "11.00"
+
+    def test_summary_removed_with_pet(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        WeightRecord.objects.create(pet=pet, date=date(2024, 1, 1), weight=Decimal("9.00"))
+
+        # Act
+        pet.delete()
+
+        # Assert
+        assert not PetSummary.objects.exists()
+
+    def test_past_figures_hidden_until_rebuild(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        PetSummary.objects.filter(pet=pet).update(
+            vet_spend_ytd=Decimal("99.00"),
+            vet_spend_year=2000,
+            next_vaccination_due=date(2000, 1, 1),
+        )
+
+        # Act
+        summary = self.list_summary(authenticated_client, pet)
+
+        # Assert
+        assert summary["vet_spend_ytd"] == "0.00"
+        assert summary["next_vaccination_due"] is None
+
+
+class TestVaccinationsDueAPI:
+    """Test GET /api/vaccinations/due/"""
+
+    def create_due(self, pet, *offsets):
+        today = date.today()
+        return [
+            Vaccination.objects.create(
+                pet=pet,
+                vaccine_name=f"Vaccine {offset}",
+                date_administered=today - timedelta(days=365),
+                due_date=today + timedelta(days=offset),
+            )
+            for offset in offsets
+        ]
+
+    def test_due_within_window_across_pets(self, authenticated_client, second_user):
+        # Arrange
+        buddy = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        shared = Pet.objects.create(name="Shared", species="cat", owner=second_user)
+        PetShare.objects.create(
+            pet=shared, shared_with=authenticated_client.user, role="viewer"
+        )
+        hidden = Pet.objects.create(name="Hidden", species="cat", owner=second_user)
+        self.create_due(buddy, 20, -1, 45)
+        self.create_due(shared, 3)
+        self.create_due(hidden, 5)
+        Vaccination.objects.create(
+            pet=buddy, vaccine_name="No due date", date_administered=date.today()
+        )
+
+        # Act
+        response = authenticated_client.get(
+            reverse("vaccination-due"), {"within": "30d"}
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data["results"]
+        assert [(r["pet_name"], r["vaccine_name"]) for r in results] == [
+            ("Shared", "Vaccine 3"),
+            ("Buddy", "Vaccine 20"),
+        ]
+
+    def test_within_in_weeks(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        self.create_due(pet, 10, 15)
+
+        # Act
+        response = authenticated_client.get(reverse("vaccination-due"), {"within": "2w"})
+
+        # Assert
+        assert [r["vaccine_name"] for r in response.data["results"]] == ["Vaccine 10"]
+
+    def test_keyset_pagination(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        self.create_due(pet, *range(1, 8))
+        url = reverse("vaccination-due")
+
+        # Act
+        first = authenticated_client.get(url, {"page_size": 3})
+        second = authenticated_client.get(first.data["next"])
+
+        # Assert
+        assert [r["vaccine_name"] for r in first.data["results"]] == [
+            "Vaccine 1", "Vaccine 2", "Vaccine 3",
+        ]
+        assert [r["vaccine_name"] for r in second.data["results"]] == [
+            "Vaccine 4", "Vaccine 5", "Vaccine 6",
+        ]
+
+    def test_pages_through_more_than_a_thousand_due_the_same_day(
+        self, authenticated_client, second_user
+    ):
+        # Arrange
+        due = date.today() + timedelta(days=7)
+        own = Pet.objects.create(name="Buddy", species="dog", owner=authenticated_client.user)
+        shared = Pet.objects.create(name="Shared", species="cat", owner=second_user)
+        PetShare.objects.create(pet=shared, shared_with=authenticated_client.user, role="viewer")
+        for pet in (own, shared):
+            Vaccination.objects.bulk_create(
+                Vaccination(
+                    pet=pet, vaccine_name="Rabies", date_administered=date.today(), due_date=due
+                )
+                for _ in range(550)
+            )
+        url = f"{reverse('vaccination-due')}?page_size=100"
+
+        # Act
+        ids = []
+        while url:
+            response = authenticated_client.get(url)
+            ids.extend(record["id"] for record in response.data["results"])
+            url = response.data["next"]
+
+        # Assert
+        assert len(ids) == 1100
+        assert ids == sorted(Vaccination.objects.values_list("id", flat=True))
+
+    def test_query_count_is_constant(self, authenticated_client):
+        # Arrange
+        for i in range(5):
+            pet = Pet.objects.create(
+                name=f"Pet{i}", species="dog", owner=authenticated_client.user
+            )
+            self.create_due(pet, i + 1)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(reverse("vaccination-due"))
+
+        # Assert
+        assert len(response.data["results"]) == 5
+        # Token lookup and one page query joining the pets
+        assert len(queries) == 2
+
+    @pytest.mark.parametrize("within", ["soon", "-3d", "1000d"])
+    def test_invalid_window(self, authenticated_client, within):
+        # Act
+        response = authenticated_client.get(
+            reverse("vaccination-due"), {"within": within}
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "within" in response.data
+
+
+class TestVetSpendSummaryAPI:
+    """Test GET /api/vet-visits/summary/"""
+
+    def create_visits(self, owner, second_user):
+        buddy = Pet.objects.create(name="Buddy", species="dog", owner=owner)
+        misty = Pet.objects.create(name="Misty", species="cat", owner=owner)
+        hidden = Pet.objects.create(name="Hidden", species="cat", owner=second_user)
+        for pet, day, vet, cost in [
+            (buddy, date(2024, 1, 5), "Dr. Smith", "50.00"),
+            (buddy, date(2024, 1, 20), "Dr. Smith", "25.50"),
+            (misty, date(2024, 3, 2), "Dr. Jones", "100.00"),
+            (misty, date(2025, 2, 1), "Dr. Smith", None),
+            (hidden, date(2024, 1, 5), "Dr. Smith", "999.00"),
+        ]:
+            VetVisit.objects.create(
+                pet=pet,
+                date=day,
+                reason="Checkup",
+                veterinarian=vet,
+                cost=Decimal(cost) if cost else None,
+            )
+        return buddy, misty
+
+    def get_summary(self, client, **params):
+        return client.get(reverse("vetvisit-summary"), params)
+
+    def test_group_by_month(self, authenticated_client, second_user):
+        # Arrange
+        self.create_visits(authenticated_client.user, second_user)
+
+        # Act
+        response = self.get_summary(authenticated_client, group_by="month")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == [
+            {"month": "2024-01", "visit_count": 2, "total_cost": "75.50"},
+            {"month": "2024-03", "visit_count": 1, "total_cost": "100.00"},
+            {"month": "2025-02", "visit_count": 1, "total_cost": "0.00"},
+        ]
+        assert response.data["visit_count"] == 4
+        assert response.data["total_cost"] == "175.50"
+
+    def test_group_by_pet(self, authenticated_client, second_user):
+        # Arrange
+        buddy, misty = self.create_visits(authenticated_client.user, second_user)
+
+        # Act
+        response = self.get_summary(authenticated_client, group_by="pet")
+
+        # Assert
+        assert response.data["results"] == [
+            {"pet": buddy.id, "pet_name": "Buddy", "visit_count": 2, "total_cost": "75.50"},
+            {"pet": misty.id, "pet_name": "Misty", "visit_count": 2, "total_cost": "100.00"},
+        ]
+
+    def test_group_by_year_and_veterinarian(self, authenticated_client, second_user):
+        # Arrange
+        self.create_visits(authenticated_client.user, second_user)
+
+        # Act
+        by_year = self.get_summary(authenticated_client, group_by="year")
+        by_vet = self.get_summary(authenticated_client, group_by="veterinarian")
+
+        # Assert
+        assert by_year.data["results"] == [
+            {"year": 2024, "visit_count": 3, "total_cost": "175.50"},
+            {"year": 2025, "visit_count": 1, "total_cost": "0.00"},
+        ]
+        assert by_vet.data["results"] == [
+            {"veterinarian": "Dr. Jones", "visit_count": 1, "total_cost": "100.00"},
+            {"veterinarian": "Dr. Smith", "visit_count": 3, "total_cost": "75.50"},
+        ]
+
+    def test_filter_by_pet(self, authenticated_client, second_user):
+        # Arrange
+        buddy, _ = self.create_visits(authenticated_client.user, second_user)
+
+        # Act
+        response = self.get_summary(authenticated_client, group_by="year", pet=buddy.id)
+
+        # Assert
+        assert response.data["total_cost"] == "75.50"
+
+    def test_closed_months_cached_current_month_live(self, authenticated_client, second_user):
+        # Arrange
+        buddy, _ = self.create_visits(authenticated_client.user, second_user)
+        self.get_summary(authenticated_client)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.get_summary(authenticated_client)
+        cached_queries = len(queries)
+        VetVisit.objects.create(
+            pet=buddy, date=date.today(), reason="Checkup", cost=Decimal("10.00")
+        )
+        updated = self.get_summary(authenticated_client, group_by="year")
+
+        # Assert
+        # The current month only
+        assert cached_queries == 1
+        assert cached.data["total_cost"] == "175.50"
+        assert updated.data["total_cost"] == "185.50"
+
+    def test_invalid_group_by(self, authenticated_client):
+        # Act
+        response = self.get_summary(authenticated_client, group_by="species")
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "group_by" in response.data
+
+
+class TestPetTimelineAPI:
+    """Test GET /api/pets/{id}/timeline/"""
+
+    def create_history(self, pet):
+        WeightRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), weight=Decimal("10.50"), unit="kg", notes="Fasted"
+        )
+        Vaccination.objects.create(
+            pet=pet, vaccine_name="Rabies", date_administered=date(2024, 1, 1)
+        )
+        VetVisit.objects.create(pet=pet, date=date(2024, 2, 1), reason="Checkup")
+        WeightRecord.objects.create(
+            pet=pet, date=date(2024, 3, 1), weight=Decimal("11.00"), unit="kg"
+        )
+
+    def test_events_merged_newest_first(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        self.create_history(pet)
+
+        # Act
+        response = authenticated_client.get(reverse("pet-timeline", kwargs={"pk": pet.id}))
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["next"] is None
+        assert [
+            (event["type"], event["event_date"], event["title"])
+            for event in response.data["results"]
+        ] == [
+            ("weight", "2024-03-01", "11.00 kg"),
+            ("vet_visit", "2024-02-01", "Checkup"),
+            ("weight", "2024-01-01", "10.50 kg"),
+            ("vaccination", "2024-01-01", "Rabies"),
+        ]
+        assert response.data["results"][2]["details"] == "Fasted"
+
+    def test_keyset_pagination_visits_every_event_once(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        start = date(2024, 1, 1)
+        for day in range(10):
+            # Every type on every day, so pages split ties on event_date
+            WeightRecord.objects.create(
+                pet=pet, date=start + timedelta(days=day), weight=Decimal("10.00")
+            )
+            Vaccination.objects.create(
+                pet=pet, vaccine_name="Rabies", date_administered=start + timedelta(days=day)
+            )
+            VetVisit.objects.create(
+                pet=pet, date=start + timedelta(days=day), reason="Checkup"
+            )
+        url = reverse("pet-timeline", kwargs={"pk": pet.id})
+
+        # Act
+        seen = []
+        response = authenticated_client.get(url, {"page_size": 4})
+        while True:
+            seen.extend((e["event_date"], e["type"], e["id"]) for e in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = authenticated_client.get(response.data["next"])
+
+        # Assert
+        assert len(seen) == 30
+        assert seen == sorted(seen, reverse=True)
+
+    def test_query_count_is_constant(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+        self.create_history(pet)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_client.get(reverse("pet-timeline", kwargs={"pk": pet.id}))
+
+        # Assert
+        # Token, pet and the UNION ALL page
+        assert len(queries) == 3
+
+    def test_invalid_cursor(self, authenticated_client):
+        # Arrange
+        pet = Pet.objects.create(
+            name="Buddy", species="dog", owner=authenticated_client.user
+        )
+
+        # Act
+        response = authenticated_client.get(
+            reverse("pet-timeline", kwargs={"pk": pet.id}), {"cursor": "garbage"}
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_other_users_pet_is_404(self, authenticated_client, second_user):
+        # Arrange
+        pet = Pet.objects.create(name="Other", species="cat", owner=second_user)
+
+        # Act
+        response = authenticated_client.get(reverse("pet-timeline", kwargs={"pk": pet.id}))
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestCachedTokenAuthentication:
+    """Test token resolution from the authentication cache"""
+
+    def test_repeat_requests_skip_token_query(self, authenticated_client):
+        # Arrange
+        url = reverse("auth-profile")
+        authenticated_client.get(url)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(url)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["username"] == authenticated_client.user.username
+        assert len(queries) == 0
+
+    def test_logout_invalidates_token(self, authenticated_client):
+        # Arrange
+        authenticated_client.get(reverse("auth-profile"))
+
+        # Act
+        authenticated_client.post(reverse("auth-logout"))
+        response = authenticated_client.get(reverse("auth-profile"))
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_token_delete_invalidates(self, authenticated_client):
+        # Arrange
+        authenticated_client.get(reverse("auth-profile"))
+
+        # Act
+        Token.objects.filter(user=authenticated_client.user).delete()
+        response = authenticated_client.get(reverse("auth-profile"))
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivation_invalidates(self, authenticated_client):
+        # Arrange
+        authenticated_client.get(reverse("auth-profile"))
+        user = authenticated_client.user
+
+        # Act
+        user.is_active = False
+        user.save()
+        response = authenticated_client.get(reverse("auth-profile"))
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_user_changes_are_not_served_stale(self, authenticated_client):
+        # Arrange
+        authenticated_client.get(reverse("auth-profile"))
+        user = authenticated_client.user
+
+        # Act
+        user.first_name = "Renamed"
+        user.save()
+        response = authenticated_client.get(reverse("auth-profile"))
+
+        # Assert
+        assert response.data["first_name"] == "Renamed"
+
+    def test_lru_evicts_oldest_entry(self):
+        # Arrange
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        # Act
+        cache.set("c", 3)
+
+        # Assert
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        # Arrange
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        now = time.monotonic()
+
+        # Act
+        monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+
+        # Assert
+        assert cache.get("a") is None
+
+    def test_shared_cache_backs_local_misses(self):
+        # Arrange
+        writer = TokenCache(maxsize=2, ttl=60, shared_alias="default", shared_ttl=60)
+        reader = TokenCache(maxsize=2, ttl=60, shared_alias="default", shared_ttl=60)
+        writer.set("key", "value")
+
+        # Act
+        shared_hit = reader.get("key")
+        writer.delete("key")
+        reader.clear()
+
+        # Assert
+        assert shared_hit == "value"
+        assert reader.get("key") is None
+
+
+    def test_revocation_reaches_other_processes(self):
+        # Arrange
+        revoker = TokenCache(maxsize=2, ttl=60, shared_alias="default", shared_ttl=60)
+        other = TokenCache(maxsize=2, ttl=60, shared_alias="default", shared_ttl=60)
+        other.set("key", "value")
+
+        # Act
+        local_hit = other.get("key")
+        revoker.delete("key")
+
+        # Assert
+        assert local_hit == "value"
+        assert other.get("key") is None
+
+    def test_async_lookup_honours_revocation(self):
+        # Arrange
+        revoker = TokenCache(maxsize=2, ttl=60, shared_alias="default", shared_ttl=60)
+        other = TokenCache(maxsize=2, ttl=60, shared_alias="default", shared_ttl=60)
+        async_to_sync(other.aset)("key", "value")
+
+        # Act
+        revoker.delete("key")
+
+        # Assert
+        assert async_to_sync(other.aget)("key") is None
+        assert revoker.get("key") is None
+
+
+class TestAsyncReadAPI:
+    """Test the async read endpoints under /api/async/"""
+
+    def create_pet(self, owner, shared_with=None):
+        pet = Pet.objects.create(name="Buddy", species="dog", owner=owner)
+        start = date(2024, 1, 1)
+        for day in range(3):
+            WeightRecord.objects.create(
+                pet=pet, date=start + timedelta(days=day), weight=Decimal("10.50")
+            )
+        Vaccination.objects.create(
+            pet=pet, vaccine_name="Rabies", date_administered=start
+        )
+        VetVisit.objects.create(pet=pet, date=start, reason="Checkup", cost=Decimal("80.00"))
+        if shared_with is not None:
+            PetShare.objects.create(pet=pet, shared_with=shared_with, role="viewer")
+        return pet
+
+    def test_pet_list_matches_sync_list(self, authenticated_client):
+        # Arrange
+        for _ in range(12):
+            Pet.objects.create(name="Buddy", species="dog", owner=authenticated_client.user)
+
+        # Act
+        response = authenticated_client.get(reverse("async-pet-list"), {"page": 2})
+        expected = authenticated_client.get(reverse("pet-list"), {"page": 2})
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["count"] == 12
+        assert response.json()["results"] == expected.json()["results"]
+        assert response.json()["previous"] == "http://testserver/api/async/pets/"
+        assert response.json()["next"] is None
+
+    def test_pet_list_invalid_page(self, authenticated_client):
+        # Act
+        response = authenticated_client.get(reverse("async-pet-list"), {"page": 2})
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_pet_detail_matches_sync_detail(self, authenticated_client, second_user):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user, shared_with=second_user)
+
+        # Act
+        response = authenticated_client.get(reverse("async-pet-detail", kwargs={"pk": pet.id}))
+        expected = authenticated_client.get(reverse("pet-detail", kwargs={"pk": pet.id}))
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == expected.json()
+        assert response.json()["record_counts"]["weight_records"] == 3
+
+    def test_pet_detail_of_other_user_not_found(self, authenticated_client, second_user):
+        # Arrange
+        pet = self.create_pet(second_user)
+
+        # Act
+        response = authenticated_client.get(reverse("async-pet-detail", kwargs={"pk": pet.id}))
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_requires_token(self):
+        # Act
+        response = APIClient().get(reverse("async-pet-list"))
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response["WWW-Authenticate"] == "Token"
+
+    def test_rejects_invalid_token(self):
+        # Arrange
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token invalidtoken123")
+
+        # Act
+        response = client.get(reverse("async-pet-list"))
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_record_list_pages_with_cursor(self, authenticated_client, second_user):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user)
+        self.create_pet(second_user)
+        url = reverse("async-weightrecord-list")
+
+        # Act
+        first = authenticated_client.get(url, {"pet": pet.id, "page_size": 2}).json()
+        second = authenticated_client.get(first["next"]).json()
+
+        # Assert
+        assert [record["date"] for record in first["results"] + second["results"]] == [
+            "2024-01-03", "2024-01-02", "2024-01-01",
+        ]
+        assert second["next"] is None
+
+    def test_record_list_rejects_invalid_cursor(self, authenticated_client):
+        # Act
+        response = authenticated_client.get(
+            reverse("async-vaccination-list"), {"cursor": "not-a-cursor"}
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_timeline_matches_sync_timeline(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user)
+        params = {"page_size": 3}
+
+        # Act
+        response = authenticated_client.get(
+            reverse("async-pet-timeline", kwargs={"pk": pet.id}), params
+        )
+        expected = authenticated_client.get(reverse("pet-timeline", kwargs={"pk": pet.id}), params)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["results"] == expected.json()["results"]
+        assert response.json()["next"] is not None
+
+    def test_weight_stats_matches_sync_stats(self, authenticated_client):
+        # Arrange
+        pet = self.create_pet(authenticated_client.user)
+
+        # Act
+        response = authenticated_client.get(
+            reverse("async-pet-weight-stats", kwargs={"pk": pet.id}), {"unit": "lb"}
+        )
+        expected = authenticated_client.get(
+            reverse("pet-weight-stats", kwargs={"pk": pet.id}), {"unit": "lb"}
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == expected.json()
+
+    def test_rejects_writes(self, authenticated_client):
+        # Act
+        response = authenticated_client.post(reverse("async-pet-list"), {"name": "Rex"})
+
+        # Assert
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+
+class TestDatabaseStatsAPI:
+    """Test GET /api/stats/database/"""
+
+    def load_settings(self, monkeypatch, **environ):
+        for name, value in environ.items():
+            monkeypatch.setenv(name, value)
+        module = runpy.run_path(str(Path(__file__).resolve().parents[2] / "config" / "settings.py"))
+        return module["DATABASES"]["default"]
+
+    def test_pooled_settings(self, monkeypatch):
+        # Act
+        database = self.load_settings(
+            monkeypatch, DB_POOL="true", DB_POOL_MAX_SIZE="4", DB_POOL_TIMEOUT="2.5"
+        )
+
+        # Assert
+        assert database["OPTIONS"]["pool"] == {"min_size": 2, "max_size": 4, "timeout": 2.5}
+        assert "CONN_MAX_AGE" not in database
+        assert database["CONN_HEALTH_CHECKS"] is True
+
+    def test_per_request_connections_under_asgi(self, monkeypatch):
+        # Act
+        database = self.load_settings(monkeypatch, SERVER_INTERFACE="asgi")
+
+        # Assert
+        assert database["CONN_MAX_AGE"] == 0
+        assert "OPTIONS" not in database
+
+    def test_requires_staff(self, authenticated_client):
+        # Act
+        response = authenticated_client.get(reverse("database-stats"))
+
+        # Assert
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_persistent_connections(self, authenticated_client):
+        # Arrange
+        authenticated_client.user.is_staff = True
+        authenticated_client.user.save()
+
+        # Act
+        response = authenticated_client.get(reverse("database-stats"))
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["pooled"] is False
+        assert response.data["health_checks"] is True
+        assert response.data["conn_max_age"] == connection.settings_dict["CONN_MAX_AGE"]
+        assert "pool" not in response.data
+
+    @pytest.fixture
+    def pooled_alias(self, db, monkeypatch):
+        """A connection to the test database with the DB_POOL settings"""
+        pooled = self.load_settings(
+            monkeypatch, DB_POOL="true", DB_POOL_MAX_SIZE="4", DB_POOL_TIMEOUT="2.5"
+        )
+        settings_dict = {
+            **connection.settings_dict,
+            "CONN_MAX_AGE": 0,
+            "OPTIONS": pooled["OPTIONS"],
+        }
+        wrapper = type(connections["default"])(settings_dict, alias="pooled")
+        connections["pooled"] = wrapper
+        yield "pooled"
+        wrapper.close()
+        wrapper.close_pool()
+        del connections["pooled"]
+
+    def test_pool_counters(self, pooled_alias):
+        # Arrange
+        with connections[pooled_alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+        # Act
+        stats = connection_stats(pooled_alias)
+
+        # Assert
+        assert stats["pooled"] is True
+        assert stats["conn_max_age"] == 0
+        assert stats["pool"]["pool_min"] == 2
+        assert stats["pool"]["pool_max"] == 4
+        assert stats["pool"]["requests_num"] >= 1
+        assert connections[pooled_alias].pool.timeout == 2.5
@@ -5,10 +5,16 @@ Tests registration, login, logout, and profile endpoints.
 """
 
 import pytest
+import threading
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework.authtoken.models import Token
+from pets.hashing import HashingUnavailable, PasswordHashingPool, password_hasher
+from pets.throttling import AuthIPThrottle, LoginUsernameThrottle
 
 
 @pytest.mark.django_db
@@ -108,6 +114,78 @@ class TestRegistrationAPI:
         assert 'email' in response.data
         assert 'already exists' in str(response.data['email'][0]).lower()
 
+    def test_register_with_duplicate_email_in_other_case(self):
+        # Arrange
+        client = APIClient()
+        User.objects.create_user(username='user1', email='Duplicate@Example.com')
+        data = {
+            'username': 'user2',
+            'email': 'duplicate@example.com',
+            'password': 'securepass123',
+            'password_confirm': 'securepass123',
+        }
+
+        # Act
+        response = client.post('/api/auth/register/', data, format='json')
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'already exists' in str(response.data['email'][0]).lower()
+        assert not User.objects.filter(username='user2').exists()
+
+    def test_register_allows_several_blank_emails(self):
+        # Arrange
+        client = APIClient()
+        User.objects.create_user(username='noemail1')
+        data = {
+            'username': 'noemail2',
+            'password': 'securepass123',
+            'password_confirm': 'securepass123',
+        }
+
+        # Act
+        response = client.post('/api/auth/register/', data, format='json')
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_register_does_not_query_for_duplicates(self):
+        # Arrange
+        client = APIClient()
+        data = {
+            'username': 'fastuser',
+            'email': 'fast@example.com',
+            'password': 'securepass123',
+            'password_confirm': 'securepass123',
+        }
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post('/api/auth/register/', data, format='json')
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['token'] == Token.objects.get(user__username='fastuser').key
+        assert not [q for q in queries if q['sql'].startswith('SELECT')]
+
+    def test_failed_registration_creates_no_token(self):
+        # Arrange
+        client = APIClient()
+        User.objects.create_user(username='taken')
+        data = {
+            'username': 'taken',
+            'password': 'securepass123',
+            'password_confirm': 'securepass123',
+        }
+
+        # Act
+        response = client.post('/api/auth/register/', data, format='json')
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['username'] == ["A user with this username already exists."]
+        assert Token.objects.count() == 0
+
     def test_register_with_mismatched_passwords(self):
         # Arrange
         client = APIClient()
@@ -402,3 +480,213 @@ class TestProfileAPI:
 
         # Assert
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestAuthThrottling:
+    """Test attempt limits of the login and registration endpoints"""
+
+    @pytest.fixture
+    def hash_calls(self, monkeypatch):
+        calls = []
+        run = password_hasher.run
+
+        def counting_run(fn, *args):
+            calls.append(fn)
+            return run(fn, *args)
+
+        monkeypatch.setattr(password_hasher, 'run', counting_run)
+        return calls
+
+    def test_login_throttled_per_username_before_hashing(self, monkeypatch, hash_calls):
+        # Arrange
+        monkeypatch.setattr(LoginUsernameThrottle, 'THROTTLE_RATES', {'auth_username': '2/min'})
+        User.objects.create_user(username='target', password='correctpass123')
+        data = {'username': 'target', 'password': 'wrongpass'}
+        for _ in range(2):
+            APIClient().post('/api/auth/login/', data, format='json')
+        hash_calls.clear()
+
+        # Act
+        response = APIClient().post(
+            '/api/auth/login/', data, format='json', REMOTE_ADDR='10.0.0.2'
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 'Retry-After' in response
+        assert hash_calls == []
+
+    def test_username_throttle_ignores_case(self, monkeypatch):
+        # Arrange
+        monkeypatch.setattr(LoginUsernameThrottle, 'THROTTLE_RATES', {'auth_username': '1/min'})
+        client = APIClient()
+        client.post('/api/auth/login/', {'username': 'Target', 'password': 'x'}, format='json')
+
+        # Act
+        response = client.post(
+            '/api/auth/login/', {'username': 'TARGET', 'password': 'x'}, format='json'
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_login_throttled_per_ip(self, monkeypatch):
+        # Arrange
+        monkeypatch.setattr(AuthIPThrottle, 'THROTTLE_RATES', {'auth_ip': '2/min'})
+        client = APIClient()
+        for username in ['first', 'second']:
+            client.post('/api/auth/login/', {'username': username, 'password': 'x'}, format='json')
+
+        # Act
+        response = client.post(
+            '/api/auth/login/', {'username': 'third', 'password': 'x'}, format='json'
+        )
+        other_ip = client.post(
+            '/api/auth/login/', {'username': 'third', 'password': 'x'},
+            format='json', REMOTE_ADDR='10.0.0.2',
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert other_ip.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_ip_throttle_ignores_spoofed_forwarded_for(self, monkeypatch):
+        # Arrange
+        monkeypatch.setattr(AuthIPThrottle, 'THROTTLE_RATES', {'auth_ip': '2/min'})
+        client = APIClient()
+
+        # Act
+        responses = [
+            client.post(
+                '/api/auth/login/', {'username': 'target', 'password': 'x'},
+                format='json', HTTP_X_FORWARDED_FOR=f'203.0.113.{attempt}',
+            )
+            for attempt in range(3)
+        ]
+
+        # Assert
+        assert responses[-1].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_ip_throttle_uses_address_from_trusted_proxy(self, monkeypatch, settings):
+        # Arrange
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        monkeypatch.setattr(AuthIPThrottle, 'THROTTLE_RATES', {'auth_ip': '1/min'})
+        client = APIClient()
+
+        def login(forwarded_for):
+            return client.post(
+                '/api/auth/login/', {'username': 'target', 'password': 'x'},
+                format='json', HTTP_X_FORWARDED_FOR=forwarded_for,
+            )
+
+        # Act
+        first = login('198.51.100.1, 203.0.113.1')
+        same_client = login('198.51.100.2, 203.0.113.1')
+        other_client = login('198.51.100.1, 203.0.113.2')
+
+        # Assert
+        assert first.status_code == status.HTTP_400_BAD_REQUEST
+        assert same_client.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert other_client.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_register_throttled_per_ip(self, monkeypatch, hash_calls):
+        # Arrange
+        monkeypatch.setattr(AuthIPThrottle, 'THROTTLE_RATES', {'auth_ip': '1/min'})
+        client = APIClient()
+        data = {
+            'username': 'newuser',
+            'email': 'new@example.com',
+            'password': 'securepass123',
+            'password_confirm': 'securepass123',
+        }
+        client.post('/api/auth/register/', data, format='json')
+        hash_calls.clear()
+
+        # Act
+        response = client.post(
+            '/api/auth/register/', {**data, 'username': 'otheruser', 'email': ''}, format='json'
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert hash_calls == []
+        assert not User.objects.filter(username='otheruser').exists()
+
+
+class TestPasswordHashingPool:
+    """Test the bounded password hashing pool"""
+
+    def test_rejects_jobs_beyond_queue(self):
+        # Arrange
+        pool = PasswordHashingPool(workers=1, queue_size=0, timeout=5)
+        started, release = threading.Event(), threading.Event()
+
+        def busy():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=pool.run, args=(busy,))
+        worker.start()
+        started.wait(5)
+
+        # Act / Assert
+        try:
+            with pytest.raises(HashingUnavailable):
+                pool.run(lambda: None)
+        finally:
+            release.set()
+            worker.join()
+        assert pool.run(lambda: 'done') == 'done'
+
+    def test_queued_job_times_out(self):
+        # Arrange
+        pool = PasswordHashingPool(workers=1, queue_size=1, timeout=0.05)
+        release = threading.Event()
+        busy = pool.executor.submit(release.wait, 5)
+
+        # Act / Assert
+        try:
+            with pytest.raises(HashingUnavailable):
+                pool.run(lambda: None)
+        finally:
+            release.set()
+            busy.result()
+
+    @pytest.mark.django_db
+    def test_login_returns_503_when_pool_is_full(self, monkeypatch):
+        # Arrange
+        User.objects.create_user(username='busyuser', password='busypass123')
+
+        def full(fn, *args):
+            raise HashingUnavailable()
+
+        monkeypatch.setattr(password_hasher, 'run', full)
+
+        # Act
+        response = APIClient().post(
+            '/api/auth/login/', {'username': 'busyuser', 'password': 'busypass123'}, format='json'
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response['Retry-After'] == '1'
+
+    @pytest.mark.django_db
+    def test_login_upgrades_outdated_hash(self):
+        # Arrange
+        hasher = PBKDF2PasswordHasher()
+        user = User.objects.create_user(username='olduser')
+        user.password = hasher.encode('oldpass123', hasher.salt(), iterations=1000)
+        user.save()
+
+        # Act
+        response = APIClient().post(
+            '/api/auth/login/', {'username': 'olduser', 'password': 'oldpass123'}, format='json'
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert hasher.decode(user.password)['iterations'] == hasher.iterations
+        assert user.check_password('oldpass123')
@@ -1,8 +1,14 @@
+import numpy as np
 import pytest
 from datetime import date
 from decimal import Decimal
+from io import StringIO
 from django.contrib.auth.models import User
-from pets.models import Pet, WeightRecord, Vaccination, VetVisit, PetShare
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from pets.analytics import lttb
+from pets.models import Pet, WeightRecord, Vaccination, VetVisit, PetShare, PetAccess, HistoryImport, PetSummary
+from pets.versions import get_data_version
 
 
 @pytest.mark.django_db
@@ -87,6 +93,51 @@ class TestWeightRecordModel:
                 pet=pet, date=date.today(), weight=Decimal("16.0"), unit="kg"
             )
 
+    def test_weight_grams_set_on_save(self):
+        pet = Pet.objects.create(name="Maxwell", species="dog")
+        weight = WeightRecord.objects.create(
+            pet=pet, date=date.today(), weight=Decimal("10.00"), unit="lb"
+        )
+        assert weight.weight_grams == 4536
+
+        weight.unit = "kg"
+        weight.save(update_fields=["unit"])
+        weight.refresh_from_db()
+        assert weight.weight_grams == 10000
+
+    def test_weight_grams_set_on_bulk_create(self):
+        pet = Pet.objects.create(name="Maxwell", species="dog")
+        WeightRecord.objects.bulk_create([
+            WeightRecord(pet=pet, date=date(2025, 1, 1), weight=Decimal("2.50"), unit="kg"),
+            WeightRecord(pet=pet, date=date(2025, 1, 2), weight=Decimal("5.00"), unit="lb"),
+        ])
+        assert list(
+            pet.weight_records.order_by("date").values_list("weight_grams", flat=True)
+        ) == [2500, 2268]
+
+    def test_weight_grams_updated_on_upsert(self):
+        pet = Pet.objects.create(name="Maxwell", species="dog")
+        WeightRecord.objects.create(
+            pet=pet, date=date(2025, 1, 1), weight=Decimal("2.50"), unit="kg"
+        )
+        WeightRecord.objects.bulk_create(
+            [WeightRecord(pet=pet, date=date(2025, 1, 1), weight=Decimal("3.00"), unit="kg")],
+            update_conflicts=True,
+            unique_fields=["pet", "date"],
+            update_fields=["weight"],
+        )
+        assert WeightRecord.objects.get(pet=pet).weight_grams == 3000
+
+    def test_order_by_mass_across_units(self):
+        pet = Pet.objects.create(name="Maxwell", species="dog")
+        WeightRecord.objects.create(pet=pet, date=date(2025, 1, 1), weight=Decimal("3.00"), unit="kg")
+        WeightRecord.objects.create(pet=pet, date=date(2025, 1, 2), weight=Decimal("5.00"), unit="lb")
+        records = WeightRecord.objects.with_weight_in("lb").order_by("weight_grams")
+        assert [(r.unit, round(r.converted_weight, 2)) for r in records] == [
+            ("lb", 5.0),
+            ("kg", 6.61),
+        ]
+
 
 @pytest.mark.django_db
 class TestVaccinationModel:
@@ -284,3 +335,152 @@ class TestPetShareModel:
         share = PetShare(pet=pet, shared_with=owner, role="viewer")
         with pytest.raises(ValidationError):
             share.clean()
+
+
+@pytest.mark.django_db
+class TestPetAccessModel:
+
+    def access_rows(self, pet):
+        return set(PetAccess.objects.filter(pet=pet).values_list("user__username", "role"))
+
+    def test_owner_row_created_with_pet(self):
+        owner = User.objects.create_user(username="access_owner", password="pass123")
+        pet = Pet.objects.create(name="Rex", species="dog", owner=owner)
+        assert self.access_rows(pet) == {("access_owner", "owner")}
+
+    def test_share_create_and_delete_sync_access(self):
+        owner = User.objects.create_user(username="access_owner", password="pass123")
+        friend = User.objects.create_user(username="access_friend", password="pass123")
+        pet = Pet.objects.create(name="Rex", species="dog", owner=owner)
+
+        share = PetShare.objects.create(pet=pet, shared_with=friend, role="editor")
+        assert ("access_friend", "editor") in self.access_rows(pet)
+
+        share.delete()
+        assert self.access_rows(pet) == {("access_owner", "owner")}
+
+    def test_owner_change_moves_owner_row(self):
+        owner = User.objects.create_user(username="access_owner", password="pass123")
+        new_owner = User.objects.create_user(username="access_new", password="pass123")
+        pet = Pet.objects.create(name="Rex", species="dog", owner=owner)
+        PetShare.objects.create(pet=pet, shared_with=new_owner, role="viewer")
+
+        pet.owner = new_owner
+        pet.save()
+
+        assert self.access_rows(pet) == {("access_new", "owner")}
+
+    def test_check_command_reports_and_fixes_drift(self):
+        owner = User.objects.create_user(username="access_owner", password="pass123")
+        pet = Pet.objects.create(name="Rex", species="dog", owner=owner)
+        PetAccess.objects.filter(pet=pet).delete()
+
+        with pytest.raises(CommandError):
+            call_command("check_pet_access", stdout=StringIO())
+
+        call_command("check_pet_access", "--fix", stdout=StringIO())
+        assert self.access_rows(pet) == {("access_owner", "owner")}
+
+    def test_backfill_command_rebuilds_table(self):
+        owner = User.objects.create_user(username="access_owner", password="pass123")
+        friend = User.objects.create_user(username="access_friend", password="pass123")
+        pet = Pet.objects.create(name="Rex", species="dog", owner=owner)
+        PetShare.objects.create(pet=pet, shared_with=friend, role="viewer")
+        PetAccess.objects.all().delete()
+
+        call_command("backfill_pet_access", "--chunk-size", "1", stdout=StringIO())
+
+        assert self.access_rows(pet) == {
+            ("access_owner", "owner"),
+            ("access_friend", "viewer"),
+        }
+
+
+@pytest.mark.django_db
+class TestImportPetHistoryCommand:
+
+    def test_import_command_reads_csv_in_chunks(self, tmp_path):
+        pet = Pet.objects.create(name="Rex", species="dog")
+        csv_path = tmp_path / "history.csv"
+        csv_path.write_text(
+            "record_type,date,weight\n"
+            + "".join(f"weight,2024-01-{day:02d},10.00\n" for day in range(1, 6))
+        )
+        out = StringIO()
+
+        call_command("import_pet_history", pet.id, str(csv_path), "--chunk-size", "2", stdout=out)
+
+        history_import = HistoryImport.objects.get(pet=pet)
+        assert history_import.status == "completed"
+        assert history_import.rows_processed == 5
+        assert WeightRecord.objects.filter(pet=pet).count() == 5
+        assert "5 weights" in out.getvalue()
+
+    def test_import_command_unknown_pet(self, tmp_path):
+        with pytest.raises(CommandError):
+            call_command("import_pet_history", 999999, str(tmp_path / "missing.csv"))
+
+
+class TestLTTB:
+    """Largest-Triangle-Three-Buckets downsampling"""
+
+    def test_keeps_endpoints_and_size(self):
+        data = np.column_stack([np.arange(1000.0), np.sin(np.arange(1000.0) / 50)])
+        sampled = lttb(data, 50)
+        assert sampled.shape == (50, 2)
+        assert tuple(sampled[0]) == tuple(data[0])
+        assert tuple(sampled[-1]) == tuple(data[-1])
+        assert np.all(np.diff(sampled[:, 0]) > 0)
+
+    def test_keeps_extremes(self):
+        y = np.zeros(300)
+        y[123] = 5.0
+        y[200] = -5.0
+        sampled = lttb(np.column_stack([np.arange(300.0), y]), 20)
+        assert 5.0 in sampled[:, 1]
+        assert -5.0 in sampled[:, 1]
+
+    def test_threshold_not_below_length(self):
+        data = np.column_stack([np.arange(5.0), np.arange(5.0)])
+        assert lttb(data, 10) is data
+
+
+@pytest.mark.django_db
+class TestRebuildPetSummariesCommand:
+
+    def test_rebuild_restores_summaries(self):
+        pets = [Pet.objects.create(name=f"Pet{i}", species="dog") for i in range(3)]
+        WeightRecord.objects.create(
+            pet=pets[0], date=date(2025, 1, 1), weight=Decimal("5.00")
+        )
+        PetSummary.objects.all().delete()
+
+        out = StringIO()
+        call_command("rebuild_pet_summaries", "--chunk-size", "2", stdout=out)
+
+        assert "3 pets" in out.getvalue()
+        summary = PetSummary.objects.get(pet=pets[0])
+        assert summary.weight_record_count == 1
+        assert summary.latest_weight == Decimal("5.00")
+
+    def test_stale_only_skips_current_summaries(self):
+        fresh = Pet.objects.create(name="Fresh", species="dog")
+        stale = Pet.objects.create(name="Stale", species="dog")
+        PetSummary.objects.filter(pet=stale).update(vet_spend_year=2000)
+
+        out = StringIO()
+        call_command("rebuild_pet_summaries", "--stale", stdout=out)
+
+        assert "1 pets" in out.getvalue()
+        assert PetSummary.objects.get(pet=stale).vet_spend_year == date.today().year
+        assert PetSummary.objects.get(pet=fresh).vet_spend_year == date.today().year
+
+    def test_rebuild_bumps_owner_data_version(self):
+        owner = User.objects.create_user(username="owner", password="pass")
+        pet = Pet.objects.create(name="Stale", species="dog", owner=owner)
+        PetSummary.objects.filter(pet=pet).update(vet_spend_year=2000)
+        before = get_data_version(owner.pk)
+
+        call_command("rebuild_pet_summaries", "--stale", stdout=StringIO())
+
+        assert get_data_version(owner.pk) > before
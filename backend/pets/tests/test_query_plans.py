@@ -0,0 +1,197 @@
+"""
+Query plan regression tests.
+
+Seeds the database, runs EXPLAIN on the querysets the viewsets issue and
+fails if Postgres has to fall back to a sequential scan or an explicit sort
+on the hot paths. Sequential scans and sorts are disabled for the planner
+inside each test transaction, so one only shows up in a plan when no index
+can serve the query, independent of how much data is seeded.
+"""
+
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from pets.access import rebuild_pet_access
+from pets.pagination import VaccinationDuePagination
+from pets.timeline import timeline_queryset
+from pets.models import Pet, WeightRecord, Vaccination, VetVisit, PetShare, PetAccess
+from pets.views import (
+    PetViewSet,
+    WeightRecordViewSet,
+    VaccinationViewSet,
+    VetVisitViewSet,
+)
+
+pytestmark = [pytest.mark.django_db]
+
+PETS = 40
+RECORDS_PER_PET = 30
+
+
+@pytest.fixture
+def seeded_user():
+    """Seed users, pets, shares and records, then refresh planner statistics"""
+    owner = User.objects.create_user(username="plan_owner", password="pass12345")
+    other = User.objects.create_user(username="plan_other", password="pass12345")
+    pets = Pet.objects.bulk_create(
+        Pet(name=f"Pet{i}", species="dog", owner=owner if i % 2 else other)
+        for i in range(PETS)
+    )
+    PetShare.objects.bulk_create(
+        PetShare(pet=pet, shared_with=owner, role="viewer")
+        for pet in pets
+        if pet.owner_id == other.id
+    )
+    rebuild_pet_access([pet.id for pet in pets])
+
+    start = date(2020, 1, 1)
+    WeightRecord.objects.bulk_create(
+        WeightRecord(pet=pet, date=start + timedelta(days=i), weight=Decimal("10.00"))
+        for pet in pets
+        for i in range(RECORDS_PER_PET)
+    )
+    Vaccination.objects.bulk_create(
+        Vaccination(
+            pet=pet,
+            vaccine_name="Rabies",
+            date_administered=start + timedelta(days=i),
+            due_date=start + timedelta(days=i + 365),
+        )
+        for pet in pets
+        for i in range(RECORDS_PER_PET)
+    )
+    VetVisit.objects.bulk_create(
+        VetVisit(pet=pet, date=start + timedelta(days=i), reason="Checkup")
+        for pet in pets
+        for i in range(RECORDS_PER_PET)
+    )
+
+    with connection.cursor() as cursor:
+        for table in ("pets_pet", "pets_petaccess", "pets_petshare",
+                      "pets_weightrecord", "pets_vaccination", "pets_vetvisit"):
+            cursor.execute(f"ANALYZE {table}")
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("SET LOCAL enable_sort = off")
+        cursor.execute("SET LOCAL enable_incremental_sort = off")
+    return owner
+
+
+def viewset_queryset(viewset_class, user, action="list", **params):
+    view = viewset_class()
+    view.request = Request(APIRequestFactory().get("/", params))
+    view.request.user = user
+    view.action = action
+    view.format_kwarg = None
+    return view.get_queryset()
+
+
+def paginated(viewset_class, queryset):
+    return paginated_by(viewset_class.pagination_class, queryset)
+
+
+def paginated_by(pagination_class, queryset):
+    return queryset.order_by(*pagination_class.ordering)[:11]
+
+
+def assert_index_only_plan(queryset, allow_sort=False):
+    plan = queryset.explain()
+    assert "Seq Scan" not in plan, plan
+    if not allow_sort:
+        assert "Sort" not in plan, plan
+
+
+class TestRecordListPlans:
+    """Per-pet record listings are served in index order"""
+
+    @pytest.mark.parametrize(
+        "viewset_class", [WeightRecordViewSet, VaccinationViewSet, VetVisitViewSet]
+    )
+    def test_pet_filtered_list_uses_index(self, seeded_user, viewset_class):
+        pet = Pet.objects.filter(owner=seeded_user).first()
+        queryset = viewset_queryset(viewset_class, seeded_user, pet=pet.id)
+        assert_index_only_plan(paginated(viewset_class, queryset))
+
+    @pytest.mark.parametrize(
+        "viewset_class", [WeightRecordViewSet, VaccinationViewSet, VetVisitViewSet]
+    )
+    def test_unfiltered_list_avoids_seq_scan(self, seeded_user, viewset_class):
+        # Records of all visible pets are merged, which needs a top-N sort
+        queryset = viewset_queryset(viewset_class, seeded_user)
+        assert_index_only_plan(paginated(viewset_class, queryset), allow_sort=True)
+
+
+class TestPetPlans:
+    """Pet visibility and detail queries"""
+
+    def test_pet_list_avoids_seq_scan(self, seeded_user):
+        # The visible pets are ordered by created_at with a top-N sort
+        queryset = viewset_queryset(PetViewSet, seeded_user)
+        assert_index_only_plan(queryset[:10], allow_sort=True)
+
+    @pytest.mark.parametrize("model", [WeightRecord, Vaccination, VetVisit])
+    def test_detail_recent_records_use_index(self, seeded_user, settings, model):
+        # Same shape as the per-pet window in the detail prefetch
+        pet = Pet.objects.filter(owner=seeded_user).first()
+        queryset = model.objects.filter(pet=pet)[: settings.PET_DETAIL_RECORD_LIMIT]
+        assert_index_only_plan(queryset)
+
+    def test_share_lookup_by_user_uses_index(self, seeded_user):
+        queryset = (
+            PetShare.objects.filter(shared_with=seeded_user)
+            .order_by()
+            .values_list("pet_id", "role")
+        )
+        assert_index_only_plan(queryset)
+
+    def test_role_map_lookup_uses_index(self, seeded_user):
+        queryset = PetAccess.objects.filter(user=seeded_user).values_list(
+            "pet_id", "role"
+        )
+        assert_index_only_plan(queryset)
+
+
+class TestVaccinationDuePlans:
+    """Due-date range scans"""
+
+    def test_due_date_range_uses_index(self, seeded_user):
+        queryset = Vaccination.objects.filter(
+            due_date__range=(date(2021, 1, 1), date(2021, 1, 10))
+        ).order_by("due_date")
+        assert_index_only_plan(queryset)
+
+    def test_due_endpoint_query_uses_index_order(self, seeded_user):
+        # Visible vaccinations in a due-date window, in keyset order
+        queryset = viewset_queryset(VaccinationViewSet, seeded_user, action="due").filter(
+            due_date__range=(date(2021, 1, 1), date(2021, 1, 10))
+        )
+        plan = paginated_by(VaccinationDuePagination, queryset).explain()
+        assert "Seq Scan" not in plan, plan
+        assert "Sort" not in plan, plan
+        assert "vaccination_due_date_id_idx" in plan, plan
+
+    def test_due_next_page_starts_at_cursor(self, seeded_user):
+        queryset = viewset_queryset(VaccinationViewSet, seeded_user, action="due").filter(
+            due_date__range=(date(2021, 1, 1), date(2021, 1, 10))
+        )
+        cursor = (date(2021, 1, 5), 10**6)
+        plan = VaccinationDuePagination().filter_after(queryset, cursor)[:11].explain()
+        assert "Seq Scan" not in plan, plan
+        assert "Sort" not in plan, plan
+        assert "vaccination_due_date_id_idx" in plan, plan
+
+
+class TestTimelinePlans:
+    """Pet timeline UNION ALL"""
+
+    def test_each_branch_uses_its_index(self, seeded_user):
+        pet = Pet.objects.filter(owner=seeded_user).first()
+        cursor = (date(2020, 1, 15), "vaccination", 10**9)
+        plan = timeline_queryset(pet, 21, cursor).explain()
+        assert "Seq Scan" not in plan, plan
+        for index in ("weightrecord_pet_date_idx", "vaccination_pet_date_idx",
+                      "vetvisit_pet_date_idx"):
+            assert index in plan, plan
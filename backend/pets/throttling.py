@@ -0,0 +1,27 @@
+import hashlib
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class AuthIPThrottle(SimpleRateThrottle):
+    """
+    Login and registration attempts per client IP. Throttles run before the
+    view, so rejected attempts never reach password hashing.
+    """
+
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginUsernameThrottle(SimpleRateThrottle):
+    """Login attempts per username, whichever IPs they come from."""
+
+    scope = 'auth_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        digest = hashlib.sha256(username.lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': digest}
@@ -0,0 +1,87 @@
+from django.db.models import CharField, F, Q, TextField, Value
+from django.db.models.functions import Cast, Concat
+from .models import WeightRecord, Vaccination, VetVisit
+
+TIMELINE_COLUMNS = ['event_date', 'type', 'id', 'title', 'details']
+
+
+def _weight_events():
+    return WeightRecord.objects.annotate(
+        event_date=F('date'),
+        title=Concat(Cast('weight', CharField()), Value(' '), 'unit', output_field=TextField()),
+    ), 'date'
+
+
+def _vaccination_events():
+    return Vaccination.objects.annotate(
+        event_date=F('date_administered'),
+        title=Cast('vaccine_name', TextField()),
+    ), 'date_administered'
+
+
+def _vet_visit_events():
+    return VetVisit.objects.annotate(
+        event_date=F('date'),
+        title=Cast('reason', TextField()),
+    ), 'date'
+
+
+# Event type -> (queryset builder, date field), one UNION ALL branch each
+TIMELINE_TYPES = {
+    'weight': _weight_events,
+    'vaccination': _vaccination_events,
+    'vet_visit': _vet_visit_events,
+}
+
+
+def _after_cursor(event_type, date_field, cursor):
+    """
+    Filter a branch to the events after `cursor` in the descending
+    (event_date, type, id) order. The type is constant within a branch, so
+    the row comparison reduces to a plain date/id condition per branch.
+    """
+    cursor_date, cursor_type, cursor_id = cursor
+    if event_type < cursor_type:
+        return Q(**{f'{date_field}__lte': cursor_date})
+    if event_type > cursor_type:
+        return Q(**{f'{date_field}__lt': cursor_date})
+    return Q(**{f'{date_field}__lt': cursor_date}) | Q(
+        **{date_field: cursor_date, 'id__lt': cursor_id}
+    )
+
+
+def timeline_queryset(pet, limit, cursor=None):
+    """
+    UNION ALL of the pet's events after `cursor`, an (event_date, type, id)
+    tuple, newest first, limited to `limit` rows.
+
+    Each branch applies the cursor and LIMIT itself, so it reads at most
+    `limit` rows from its (pet, date, id) index however long the history is.
+    """
+    branches = []
+    for event_type, build in TIMELINE_TYPES.items():
+        queryset, date_field = build()
+        queryset = queryset.filter(pet=pet)
+        if cursor is not None:
+            queryset = queryset.filter(_after_cursor(event_type, date_field, cursor))
+        branches.append(
+            queryset.annotate(type=Value(event_type, output_field=TextField()),
+                              details=Cast('notes', TextField()))
+            .order_by(f'-{date_field}', '-id')
+            .values_list(*TIMELINE_COLUMNS)[:limit]
+        )
+    first, *rest = branches
+    return first.union(*rest, all=True).order_by('-event_date', '-type', '-id')[:limit]
+
+
+def timeline_page(pet, limit, cursor=None):
+    """Up to `limit` of the pet's events after `cursor`, as dicts."""
+    return [dict(zip(TIMELINE_COLUMNS, row)) for row in timeline_queryset(pet, limit, cursor)]
+
+
+async def atimeline_page(pet, limit, cursor=None):
+    """timeline_page() with the async ORM."""
+    return [
+        dict(zip(TIMELINE_COLUMNS, row))
+        async for row in timeline_queryset(pet, limit, cursor)
+    ]
@@ -2,8 +2,9 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     PetViewSet, WeightRecordViewSet, VaccinationViewSet, VetVisitViewSet,
-    register, login, logout, profile
+    register, login, logout, profile, database_stats
 )
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'pets', PetViewSet)
@@ -17,6 +18,17 @@ urlpatterns = [
     path('auth/login/', login, name='auth-login'),
     path('auth/logout/', logout, name='auth-logout'),
     path('auth/profile/', profile, name='auth-profile'),
+    # Operational stats (staff only)
+    path('stats/database/', database_stats, name='database-stats'),
+    # Async read endpoints (for ASGI deployments)
+    path('async/pets/', async_views.pet_list, name='async-pet-list'),
+    path('async/pets/<int:pk>/', async_views.pet_detail, name='async-pet-detail'),
+    path('async/pets/<int:pk>/timeline/', async_views.pet_timeline, name='async-pet-timeline'),
+    path('async/pets/<int:pk>/weight-stats/', async_views.pet_weight_stats,
+         name='async-pet-weight-stats'),
+    path('async/weight-records/', async_views.weight_record_list, name='async-weightrecord-list'),
+    path('async/vaccinations/', async_views.vaccination_list, name='async-vaccination-list'),
+    path('async/vet-visits/', async_views.vet_visit_list, name='async-vetvisit-list'),
     # Pet management endpoints
     path('', include(router.urls)),
 ]
\ No newline at end of file
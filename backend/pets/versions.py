@@ -0,0 +1,99 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import PetAccess
+
+DATA_VERSION_HEADER = 'X-Data-Version'
+
+
+def data_version_key(user_id):
+    return f'pets:data-version:{user_id}'
+
+
+def pet_data_version_key(pet_id):
+    return f'pets:pet-data-version:{pet_id}'
+
+
+def _seed():
+    # A counter lost to eviction or a cache restart restarts from the clock
+    # (in microseconds), which is always ahead of any value handed out before.
+    return time.time_ns() // 1000
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def data_versions_shared():
+    """
+    Whether all processes read the same versions, so that a version may
+    validate a client's copy or key a cached response.
+    """
+    return settings.DATA_VERSIONS_SHARED
+
+
+def get_data_version(user_id):
+    """
+    Return the version of everything the user can see: their pets, the pets
+    shared with them, and those pets' records and shares.
+    """
+    return _get_version(data_version_key(user_id))
+
+
+def get_pet_data_version(pet_id):
+    """Return the version of a single pet, its records and its shares."""
+    return _get_version(pet_data_version_key(pet_id))
+
+
+def get_request_data_version(request):
+    """get_data_version() for the requesting user, memoized on the request."""
+    version = getattr(request, '_data_version', None)
+    if version is None:
+        version = request._data_version = get_data_version(request.user.pk)
+    return version
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _seed(), timeout=None)
+
+
+def _bump_versions(keys):
+    # Inside a transaction the versions are bumped again once it commits, so
+    # a response built from the not yet committed state can never be
+    # validated against the final version.
+    keys = set(keys)
+    if not keys:
+        return
+    _bump(keys)
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def bump_data_versions(user_ids):
+    """Advance the data version of the given users."""
+    _bump_versions(data_version_key(user_id) for user_id in user_ids)
+
+
+def bump_pet_data_versions(pet_ids, extra_user_ids=()):
+    """
+    Advance the version of the given pets and the data version of every
+    user with access to them.
+    """
+    pet_ids = set(pet_ids)
+    user_ids = set(
+        PetAccess.objects.filter(pet_id__in=pet_ids).values_list('user_id', flat=True)
+    )
+    _bump_versions(
+        [pet_data_version_key(pet_id) for pet_id in pet_ids]
+        + [data_version_key(user_id) for user_id in user_ids | set(extra_user_ids)]
+    )
@@ -1,23 +1,83 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.authtoken.models import Token
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from django.db.models import Q
-from .models import Pet, WeightRecord, Vaccination, VetVisit, PetShare
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAdminUser, IsAuthenticated
+from django.conf import settings
+from django.utils import timezone
+from django.http import StreamingHttpResponse
+from django.db import transaction
+from django.db.models import (
+    BooleanField,
+    Count,
+    ExpressionWrapper,
+    F,
+    Max,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
+from .models import Pet, WeightRecord, Vaccination, VetVisit, PetShare, HistoryImport
 from .serializers import (
     PetSerializer,
     PetListSerializer,
     WeightRecordSerializer,
     VaccinationSerializer,
+    VaccinationDueSerializer,
     VetVisitSerializer,
     RegisterSerializer,
     LoginSerializer,
     UserSerializer,
     PetShareSerializer,
+    HistoryImportSerializer,
+    TimelineEventSerializer,
 )
 from .permissions import PetAccessPermission, IsShareOwner
+from .history import (
+    ImportFileError,
+    decode_lines,
+    iter_history,
+    run_history_import,
+    stream_csv,
+    stream_ndjson,
+)
+from .analytics import (
+    VET_SPEND_GROUPS,
+    WEIGHT_UNITS,
+    group_vet_spend,
+    vet_spend_rollups,
+    weight_series,
+    weight_stats,
+)
+from .renderers import CSVRenderer, NDJSONRenderer
+from .timeline import timeline_page
+from .conditional import make_etag, not_modified_response, set_validators
+from .pagination import (
+    WeightRecordPagination,
+    VaccinationPagination,
+    VetVisitPagination,
+    VaccinationDuePagination,
+    TimelinePagination,
+)
+from .access import get_pet_role, OWNER, WRITE_ROLES
+from .versions import (
+    DATA_VERSION_HEADER,
+    bump_pet_data_versions,
+    data_versions_shared,
+    get_pet_data_version,
+    get_request_data_version,
+)
+from .caching import CACHE_STATUS_HEADER, response_cache
+from .summaries import refresh_pet_summaries
+from .db import connection_stats
+from .throttling import AuthIPThrottle, LoginUsernameThrottle
 import logging
+import re
+from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +86,7 @@ logger = logging.getLogger(__name__)
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle])
 def register(request):
     """
     Register a new user and return auth token.
@@ -37,7 +98,7 @@ def register(request):
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
-        token, created = Token.objects.get_or_create(user=user)
+        token = user.auth_token
         user_serializer = UserSerializer(user)
         return Response(
             {"token": token.key, "user": user_serializer.data},
@@ -48,6 +109,7 @@ def register(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, LoginUsernameThrottle])
 def login(request):
     """
     Login user and return auth token.
@@ -106,10 +168,124 @@ def profile(request):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def database_stats(request):
+    """
+    Database connection reuse of the worker process serving the request.
+
+    GET /api/stats/database/
+    Returns: {alias, pooled, conn_max_age, health_checks, pool?: {pool_size, pool_available, requests_waiting, ...}}
+    """
+    return Response(connection_stats(), status=status.HTTP_200_OK)
+
+
 # Pet Management ViewSets
 
 
-class PetViewSet(viewsets.ModelViewSet):
+def _record_aggregate(model, aggregate):
+    """Correlated aggregate over a record model's rows for the outer pet."""
+    return Subquery(
+        model.objects.filter(pet=OuterRef("pk"))
+        .order_by()
+        .values("pet")
+        .annotate(value=aggregate)
+        .values("value")
+    )
+
+
+def _record_count(model):
+    return Coalesce(_record_aggregate(model, Count("pk")), 0)
+
+
+def parse_due_window(value):
+    """Parse a ?within= window such as "30d", "6w" or "30" into days."""
+    match = re.fullmatch(r"(\d+)([dw]?)", value.strip().lower())
+    days = int(match[1]) * (7 if match[2] == "w" else 1) if match else None
+    if days is None or days > settings.VACCINATION_DUE_MAX_DAYS:
+        raise ValidationError(
+            {
+                "within": [
+                    "Use a number of days or weeks such as 30d or 6w, "
+                    f"up to {settings.VACCINATION_DUE_MAX_DAYS} days."
+                ]
+            }
+        )
+    return days
+
+
+def with_recent_records(queryset):
+    """
+    Prefetch the most recent PET_DETAIL_RECORD_LIMIT records of each type per
+    pet (a ROW_NUMBER() window partitioned by pet) and annotate the totals.
+    """
+    limit = settings.PET_DETAIL_RECORD_LIMIT
+    return queryset.prefetch_related(
+        "shares__shared_with",
+        Prefetch(
+            "weight_records",
+            queryset=WeightRecord.objects.all()[:limit],
+            to_attr="recent_weight_records",
+        ),
+        Prefetch(
+            "vaccinations",
+            queryset=Vaccination.objects.all()[:limit],
+            to_attr="recent_vaccinations",
+        ),
+        Prefetch(
+            "vet_visits",
+            queryset=VetVisit.objects.all()[:limit],
+            to_attr="recent_vet_visits",
+        ),
+    ).annotate(
+        weight_records_count=_record_count(WeightRecord),
+        vaccinations_count=_record_count(Vaccination),
+        vet_visits_count=_record_count(VetVisit),
+    )
+
+
+def visible_pets(user):
+    """The pets the user can access, annotated with the access fields."""
+    return Pet.objects.filter(access__user=user).annotate(
+        # Resolved from the same PetAccess join used for visibility
+        user_role=F("access__role"),
+        is_shared=ExpressionWrapper(
+            ~Q(access__role=OWNER), output_field=BooleanField()
+        ),
+        owner_username=F("owner__username"),
+    )
+
+
+class DataVersionMixin:
+    """Send the requesting user's data version with every response."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.user and request.user.is_authenticated and data_versions_shared():
+            if request.method not in SAFE_METHODS:
+                # Report the version after this request's own changes
+                request._data_version = None
+            response[DATA_VERSION_HEADER] = str(get_request_data_version(request))
+        return response
+
+    def data_version_etag(self):
+        """
+        ETag of a listing, validated with a single cache lookup. None when
+        data versions are not shared, as another process may not have seen
+        the latest change.
+        """
+        request = self.request
+        if not data_versions_shared():
+            return None
+        return make_etag(
+            request.user.pk,
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            get_request_data_version(request),
+        )
+
+
+class PetViewSet(DataVersionMixin, viewsets.ModelViewSet):
     queryset = Pet.objects.all()
 
     def get_serializer_class(self):
@@ -120,17 +296,108 @@ class PetViewSet(viewsets.ModelViewSet):
         return PetSerializer
 
     def get_queryset(self):
-        user = self.request.user
-        return (
-            Pet.objects.filter(Q(owner=user) | Q(shares__shared_with=user))
-            .distinct()
-            .prefetch_related("shares__shared_with")
+        queryset = visible_pets(self.request.user)
+        if self.action == "list":
+            queryset = queryset.select_related("summary")
+        elif self.action in ("retrieve", "update", "partial_update"):
+            queryset = with_recent_records(queryset)
+        return queryset
+
+    def detail_validators(self):
+        """
+        ETag and Last-Modified of the pet detail, from one aggregate query
+        over the pet, its records and its shares. None if the pet is not
+        visible to the user.
+        """
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        stats = {}
+        for name, model in (
+            ("weight_records", WeightRecord),
+            ("vaccinations", Vaccination),
+            ("vet_visits", VetVisit),
+        ):
+            stats[f"{name}_count"] = _record_count(model)
+            stats[f"{name}_modified"] = _record_aggregate(model, Max("updated_at"))
+        stats["shares_count"] = _record_count(PetShare)
+        stats["shares_modified"] = _record_aggregate(PetShare, Max("created_at"))
+        try:
+            row = (
+                Pet.objects.filter(pk=pk, access__user=self.request.user)
+                .values("updated_at", role=F("access__role"))
+                .annotate(**stats)
+                .first()
+            )
+        except (TypeError, ValueError):
+            return None
+        if row is None:
+            return None
+        last_modified = max(
+            value for key, value in row.items()
+            if (key == "updated_at" or key.endswith("_modified")) and value
+        )
+        etag = make_etag(
+            self.request.user.pk,
+            # Query parameters such as ?weight_unit= change the body
+            self.request.get_full_path(),
+            self.request.accepted_renderer.format,
+            settings.PET_DETAIL_RECORD_LIMIT,
+            sorted(row.items()),
         )
+        return etag, last_modified
+
+    def response_cache_key(self, pet_id):
+        request = self.request
+        return response_cache.make_key(
+            request.user.pk,
+            pet_id,
+            get_request_data_version(request),
+            # Serialized links are absolute, so the host is part of the key
+            f"{request.build_absolute_uri()} {request.accepted_renderer.format}",
+        )
+
+    def list(self, request, *args, **kwargs):
+        etag = self.data_version_etag()
+        response = not_modified_response(request, etag)
+        if response is not None:
+            return response
+        key = self.response_cache_key("list")
+        data = response_cache.get(key)
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            response_cache.set(key, response.data)
+            response[CACHE_STATUS_HEADER] = "MISS"
+        else:
+            response = Response(data)
+            response[CACHE_STATUS_HEADER] = "HIT"
+        return set_validators(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        key = self.response_cache_key(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        cached = response_cache.get(key)
+        if cached is None:
+            validators = self.detail_validators()
+            if validators is None:
+                return super().retrieve(request, *args, **kwargs)
+        else:
+            data, validators = cached
+        # Answer conditional requests before building the nested payload
+        response = not_modified_response(request, *validators)
+        if response is not None:
+            return response
+        if cached is None:
+            response = super().retrieve(request, *args, **kwargs)
+            response_cache.set(key, (response.data, validators))
+            response[CACHE_STATUS_HEADER] = "MISS"
+        else:
+            response = Response(data)
+            response[CACHE_STATUS_HEADER] = "HIT"
+        return set_validators(response, *validators)
 
     def get_permissions(self):
         if self.action in ("share", "unshare", "shared_with"):
             return [IsAuthenticated(), IsShareOwner()]
-        if self.action == "create":
+        if self.action in ("create", "import_history"):
+            # Imports check for a write role on the pet themselves
             return [IsAuthenticated()]
         return [IsAuthenticated(), PetAccessPermission()]
 
@@ -161,6 +428,136 @@ class PetViewSet(viewsets.ModelViewSet):
                 {"detail": "Share not found."}, status=status.HTTP_404_NOT_FOUND
             )
 
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="export",
+        renderer_classes=[CSVRenderer, NDJSONRenderer],
+    )
+    def export(self, request, pk=None):
+        """
+        Stream a pet's full record history.
+
+        GET /api/pets/{id}/export/?format=csv|ndjson
+        Returns: one row per weight record, vaccination and vet visit
+        """
+        pet = self.get_object()
+        rows = iter_history(pet)
+        if request.accepted_renderer.format == "ndjson":
+            content, extension = stream_ndjson(rows), "ndjson"
+        else:
+            content, extension = stream_csv(rows), "csv"
+        response = StreamingHttpResponse(
+            content, content_type=request.accepted_renderer.media_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="pet-{pet.pk}-history.{extension}"'
+        )
+        return response
+
+    @action(detail=True, methods=["get"])
+    def timeline(self, request, pk=None):
+        """
+        A pet's weight records, vaccinations and vet visits merged into one
+        chronological feed, newest first.
+
+        GET /api/pets/{id}/timeline/?page_size=N&cursor=<next cursor>
+        Returns: {"next": url or null, "results": [{type, id, event_date, title, details}]}
+        """
+        pet = self.get_object()
+        paginator = TimelinePagination()
+        events = paginator.paginate(
+            lambda limit, cursor: timeline_page(pet, limit, cursor), request
+        )
+        return paginator.get_paginated_response(
+            TimelineEventSerializer(events, many=True).data
+        )
+
+    @action(detail=True, methods=["get"], url_path="weight-stats")
+    def weight_stats(self, request, pk=None):
+        """
+        Weight trend analytics computed in the database.
+
+        GET /api/pets/{id}/weight-stats/?unit=kg|lb
+        Returns: unit-normalized series with rolling averages, min/max,
+        percent change over 30/90/365 days and the linear trend per day
+        """
+        unit = request.query_params.get("unit", "kg")
+        if unit not in WEIGHT_UNITS:
+            raise ValidationError({"unit": [f"Must be one of: {', '.join(WEIGHT_UNITS)}."]})
+        return Response(weight_stats(self.get_object(), unit=unit))
+
+    @action(detail=True, methods=["get"], url_path="weight-series")
+    def weight_series(self, request, pk=None):
+        """
+        Weight series for charts, downsampled with LTTB.
+
+        GET /api/pets/{id}/weight-series/?points=N&unit=kg|lb
+        Returns: at most N readings (default WEIGHT_SERIES_DEFAULT_POINTS)
+        """
+        unit = request.query_params.get("unit", "kg")
+        if unit not in WEIGHT_UNITS:
+            raise ValidationError({"unit": [f"Must be one of: {', '.join(WEIGHT_UNITS)}."]})
+        points = request.query_params.get("points", settings.WEIGHT_SERIES_DEFAULT_POINTS)
+        try:
+            points = int(points)
+        except (TypeError, ValueError):
+            points = 0
+        if not 3 <= points <= settings.WEIGHT_SERIES_MAX_POINTS:
+            raise ValidationError(
+                {"points": [f"Must be between 3 and {settings.WEIGHT_SERIES_MAX_POINTS}."]}
+            )
+        pet = self.get_object()
+
+        key = response_cache.make_pet_key(
+            pet.pk, get_pet_data_version(pet.pk), f"weight-series {unit} {points}"
+        )
+        data = response_cache.get(key)
+        if data is None:
+            series, total = weight_series(pet, unit=unit, points=points)
+            data = {"unit": unit, "total": total, "points": series}
+            response_cache.set(key, data)
+        return Response(data)
+
+    @action(detail=True, methods=["post"], url_path="import")
+    def import_history(self, request, pk=None):
+        """
+        Import record history from a CSV file in the export format.
+
+        POST /api/pets/{id}/import/
+        Body (multipart): file, resume? (id of an interrupted import of the same file)
+        Returns: the import summary
+        """
+        pet = self.get_object()
+        # Importing adds records, which owners and editors may do
+        if get_pet_role(request, pet) not in WRITE_ROLES:
+            raise PermissionDenied(
+                "You do not have permission to add records to this pet."
+            )
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": ["No file was submitted."]})
+
+        resume_id = request.data.get("resume")
+        if resume_id:
+            history_import = get_object_or_404(HistoryImport, pk=resume_id, pet=pet)
+        else:
+            history_import = HistoryImport.objects.create(
+                pet=pet, created_by=request.user, source_name=upload.name
+            )
+        try:
+            run_history_import(history_import, decode_lines(upload))
+        except ImportFileError:
+            # The summary reports the row the file became unreadable at
+            return Response(
+                HistoryImportSerializer(history_import).data,
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            HistoryImportSerializer(history_import).data,
+            status=status.HTTP_201_CREATED,
+        )
+
     @action(detail=True, methods=["get"], url_path="shared-with")
     def shared_with(self, request, pk=None):
         """List users this pet is shared with. GET /api/pets/{id}/shared-with/"""
@@ -170,100 +567,198 @@ class PetViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class WeightRecordViewSet(viewsets.ModelViewSet):
-    queryset = WeightRecord.objects.all()
-    serializer_class = WeightRecordSerializer
+class PetRecordViewSet(DataVersionMixin, viewsets.ModelViewSet):
+    """Shared behaviour for the per-pet record endpoints."""
+
     permission_classes = [IsAuthenticated, PetAccessPermission]
 
     def get_queryset(self):
         user = self.request.user
-        queryset = WeightRecord.objects.filter(
-            Q(pet__owner=user) | Q(pet__shares__shared_with=user)
-        ).distinct()
+        queryset = self.queryset.filter(pet__access__user=user)
         pet_id = self.request.query_params.get("pet", None)
         if pet_id is not None:
             queryset = queryset.filter(pet_id=pet_id)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        etag = self.data_version_etag()
+        # If-None-Match is answered without touching the database
+        response = not_modified_response(request, etag)
+        if response is not None:
+            return response
+        last_modified = self.last_modified()
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = set_validators(
+                super().list(request, *args, **kwargs), etag, last_modified
+            )
+        return response
+
+    def last_modified(self):
+        """
+        Last-Modified of a listing: the newest updated_at of the visible
+        pets it covers, which record writes and deletes advance. Reads the
+        user's access rows rather than every record.
+        """
+        pets = Pet.objects.filter(access__user=self.request.user)
+        pet_id = self.request.query_params.get("pet", None)
+        if pet_id is not None:
+            pets = pets.filter(pk=pet_id)
+        return pets.aggregate(modified=Max("updated_at"))["modified"]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        upsert = self.request.query_params.get("upsert", "").lower() in ("1", "true")
+        if upsert and self.action in ("create", "bulk"):
+            if not getattr(self.get_serializer_class(), "upsert_fields", None):
+                raise ValidationError(
+                    {"upsert": ["Upsert is not supported for this record type."]}
+                )
+            context["upsert"] = True
+        return context
+
+    def check_record_write_access(self, pets):
+        # Only owners and editors can add records
+        if any(get_pet_role(self.request, pet) not in WRITE_ROLES for pet in pets):
+            raise PermissionDenied(
+                "You do not have permission to add records to this pet."
+            )
+
+    # The summary and version handlers run on post_save / post_delete, so
+    # writes are wrapped for them to commit or roll back with the record
+
     def perform_create(self, serializer):
-        pet = serializer.validated_data["pet"]
-        user = self.request.user
-        # Owner can always create
-        if pet.owner == user:
+        self.check_record_write_access([serializer.validated_data["pet"]])
+        with transaction.atomic():
             serializer.save()
-            return
-        # Check share role
-        share = PetShare.objects.filter(pet=pet, shared_with=user).first()
-        if share and share.role == "editor":
-            serializer.save()
-            return
-        # Viewer or no share — deny
-        from rest_framework.exceptions import PermissionDenied
 
-        raise PermissionDenied("You do not have permission to add records to this pet.")
+    def perform_update(self, serializer):
+        previous_pet_id = serializer.instance.pet_id
+        pet = serializer.validated_data.get("pet")
+        if pet is not None and pet.pk != previous_pet_id:
+            self.check_record_write_access([pet])
+        with transaction.atomic():
+            record = serializer.save()
+            if record.pet_id != previous_pet_id:
+                # The handlers only see the pet the record moved to
+                refresh_pet_summaries([previous_pet_id])
+                bump_pet_data_versions([previous_pet_id])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Create a batch of records in one transaction.
+
+        POST /api/<records>/bulk/[?upsert=true]
+        Body: [{record}, ...] (at most RECORD_BATCH_MAX_SIZE items)
+        Returns: the created records, or a list of per-item errors
+        """
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.RECORD_BATCH_MAX_SIZE,
+        )
+        serializer.is_valid(raise_exception=True)
+        # Checked once per distinct pet, from the per-request role map
+        self.check_record_write_access(
+            {item["pet"] for item in serializer.validated_data}
+        )
+        with transaction.atomic():
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class VaccinationViewSet(viewsets.ModelViewSet):
-    queryset = Vaccination.objects.all()
-    serializer_class = VaccinationSerializer
-    permission_classes = [IsAuthenticated, PetAccessPermission]
+class WeightRecordViewSet(PetRecordViewSet):
+    """
+    Weight records. POST (single or bulk) with ?upsert=true replaces the
+    reading of an existing (pet, date) in one INSERT ... ON CONFLICT statement.
+    """
 
-    def get_queryset(self):
-        user = self.request.user
-        queryset = Vaccination.objects.filter(
-            Q(pet__owner=user) | Q(pet__shares__shared_with=user)
-        ).distinct()
-        pet_id = self.request.query_params.get("pet", None)
-        if pet_id is not None:
-            queryset = queryset.filter(pet_id=pet_id)
-        return queryset
+    queryset = WeightRecord.objects.all()
+    serializer_class = WeightRecordSerializer
+    pagination_class = WeightRecordPagination
 
-    def perform_create(self, serializer):
-        pet = serializer.validated_data["pet"]
-        user = self.request.user
-        # Owner can always create
-        if pet.owner == user:
-            serializer.save()
-            return
-        # Check share role
-        share = PetShare.objects.filter(pet=pet, shared_with=user).first()
-        if share and share.role == "editor":
-            serializer.save()
-            return
-        # Viewer or no share — deny
-        from rest_framework.exceptions import PermissionDenied
 
-        raise PermissionDenied("You do not have permission to add records to this pet.")
+class VaccinationViewSet(PetRecordViewSet):
+    queryset = Vaccination.objects.all()
+    serializer_class = VaccinationSerializer
+    pagination_class = VaccinationPagination
+
+    @action(detail=False, methods=["get"])
+    def due(self, request):
+        """
+        Vaccinations falling due across every pet the user can see.
+
+        GET /api/vaccinations/due/?within=30d
+        Returns: vaccinations with a due date from today to today + within
+        (days "d" or weeks "w", at most VACCINATION_DUE_MAX_DAYS), in
+        (due_date, id) order with keyset pagination
+        """
+        days = parse_due_window(request.query_params.get("within", "30d"))
+        today = timezone.localdate()
+        queryset = (
+            self.get_queryset()
+            .filter(due_date__range=(today, today + timedelta(days=days)))
+            .select_related("pet")
+        )
+        paginator = VaccinationDuePagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = VaccinationDueSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
 
 
-class VetVisitViewSet(viewsets.ModelViewSet):
+class VetVisitViewSet(PetRecordViewSet):
     queryset = VetVisit.objects.all()
     serializer_class = VetVisitSerializer
-    permission_classes = [IsAuthenticated, PetAccessPermission]
-
-    def get_queryset(self):
-        user = self.request.user
-        queryset = VetVisit.objects.filter(
-            Q(pet__owner=user) | Q(pet__shares__shared_with=user)
-        ).distinct()
-        pet_id = self.request.query_params.get("pet", None)
-        if pet_id is not None:
-            queryset = queryset.filter(pet_id=pet_id)
-        return queryset
-
-    def perform_create(self, serializer):
-        pet = serializer.validated_data["pet"]
-        user = self.request.user
-        # Owner can always create
-        if pet.owner == user:
-            serializer.save()
-            return
-        # Check share role
-        share = PetShare.objects.filter(pet=pet, shared_with=user).first()
-        if share and share.role == "editor":
-            serializer.save()
-            return
-        # Viewer or no share — deny
-        from rest_framework.exceptions import PermissionDenied
+    pagination_class = VetVisitPagination
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        """
+        Vet spending of the visible pets, aggregated in SQL.
+
+        GET /api/vet-visits/summary/?group_by=pet|month|year|veterinarian[&pet=<id>]
+        Returns: visit count and total cost per group, and overall totals
+        """
+        group_by = request.query_params.get("group_by", "month")
+        if group_by not in VET_SPEND_GROUPS:
+            raise ValidationError(
+                {"group_by": [f"Must be one of: {', '.join(VET_SPEND_GROUPS)}."]}
+            )
+        visits = self.get_queryset()
+        month_start = timezone.localdate().replace(day=1)
+
+        # Past months can no longer gain visits without a data version
+        # bump, so their rollups are cached and only the current month
+        # is aggregated on every request.
+        key = response_cache.make_key(
+            request.user.pk,
+            "vet-spend",
+            get_request_data_version(request),
+            f"{month_start} {request.query_params.get('pet', '')}",
+        )
+        closed = response_cache.get(key)
+        if closed is None:
+            closed = vet_spend_rollups(visits.filter(date__lt=month_start))
+            response_cache.set(key, closed)
+        current = vet_spend_rollups(visits.filter(date__gte=month_start))
 
-        raise PermissionDenied("You do not have permission to add records to this pet.")
+        results = group_vet_spend(closed + current, group_by)
+        return Response(
+            {
+                "group_by": group_by,
+                "results": [
+                    {**group, "total_cost": f"{group['total_cost']:.2f}"}
+                    for group in results
+                ],
+                "visit_count": sum(group["visit_count"] for group in results),
+                "total_cost": f"{sum(group['total_cost'] for group in results):.2f}",
+            }
+        )